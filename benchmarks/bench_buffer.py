@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Compares assembling a recording with EEGBuffer against the old per-chunk np.concatenate loop on a synthetic stream
+"""
+import argparse
+import time
+import numpy as np
+from daedalus.ssvep.buffers import EEGBuffer
+
+
+def synthetic_chunks(minutes, sfreq, n_chans, chunk_size):
+    """
+    Yields (samples, timestamps) chunks the way pull_chunk returns them
+    """
+    n_chunks = int(minutes * 60 * sfreq / chunk_size)
+    rng = np.random.default_rng(0)
+    chunk = rng.standard_normal((chunk_size, n_chans)).astype(np.float32)
+    for i in range(n_chunks):
+        yield chunk, np.arange(i * chunk_size, (i + 1) * chunk_size) / sfreq
+
+
+def legacy(chunks):
+    raw_df = np.array([])
+    for chunk, _ in chunks:
+        this_chunk = np.array(chunk).transpose()
+        if raw_df.size == 0:
+            raw_df = this_chunk
+        else:
+            raw_df = np.concatenate((raw_df, this_chunk), axis=1)
+    return raw_df
+
+
+def buffered(chunks, n_chans, chunk_size):
+    buf = EEGBuffer(n_chans, chunk_size)
+    for chunk, stamps in chunks:
+        # same path as pull_chunk(dest_obj=...): write into the reserved block, then commit
+        buf.reserve()[:len(chunk)] = chunk
+        buf.commit(stamps)
+    return buf.to_array()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sfreq", type=float, default=250)
+    parser.add_argument("--chans", type=int, default=16)
+    parser.add_argument("--chunk", type=int, default=25)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 5, 10])
+    args = parser.parse_args()
+
+    print(f"{'minutes':>8} {'legacy (s)':>12} {'EEGBuffer (s)':>14}")
+    for minutes in args.minutes:
+        t0 = time.perf_counter()
+        old = legacy(synthetic_chunks(minutes, args.sfreq, args.chans, args.chunk))
+        t1 = time.perf_counter()
+        new = buffered(synthetic_chunks(minutes, args.sfreq, args.chans, args.chunk), args.chans, args.chunk)
+        t2 = time.perf_counter()
+        assert np.array_equal(old, new)
+        print(f"{minutes:>8} {t1 - t0:>12.3f} {t2 - t1:>14.3f}")
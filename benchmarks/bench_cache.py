@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Cold (parsing csv) versus warm (binary cache) load times of a synthetic corpus of subject files
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from daedalus.analysis.cache import SessionCache, CACHE_FORMAT
+from daedalus.analysis.data_utils import read_files, to_pandas
+
+# the corpus generator lives next to this script, wherever it's run from
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_loader import make_corpus  # noqa: E402
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subjects", type=int, default=200)
+    parser.add_argument("--trials", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_corpus(tmp, args.subjects, args.trials)
+        files = read_files("psyc", known_path=tmp)
+        cache = SessionCache(os.path.join(tmp, ".cache"))
+
+        for run in ("cold", "warm"):
+            t0 = time.perf_counter()
+            to_pandas(files, cache=cache)
+            print(f"{run} to_pandas: {time.perf_counter() - t0:.2f} s")
+
+        print(f"\n{CACHE_FORMAT} cache, {cache.size / 1e6:.1f} MB")
+        print(cache.report())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Compares the old np.savetxt export of a recording with the binary export and the parallel CSV conversion
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from daedalus.ssvep.export import save_binary, to_csv
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sfreq", type=float, default=250)
+    parser.add_argument("--chans", type=int, default=16)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    n_samples = int(args.minutes * 60 * args.sfreq)
+    eeg = np.random.default_rng(0).standard_normal((args.chans, n_samples)).astype(np.float32) * 50
+    events = np.array([[i, 0, 1] for i in range(0, n_samples, 1000)])
+    chan_names = [f"EEG{i + 1:03d}" for i in range(args.chans)]
+    mb = eeg.nbytes / 1e6
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "bench")
+        results = []
+
+        t0 = time.perf_counter()
+        np.savetxt(base + "_savetxt.csv", eeg, delimiter=",")
+        results.append(("np.savetxt", time.perf_counter() - t0, base + "_savetxt.csv"))
+
+        t0 = time.perf_counter()
+        paths = save_binary(base, eeg, events, chan_names, args.sfreq)
+        results.append(("save_binary", time.perf_counter() - t0, paths["eeg"]))
+
+        t0 = time.perf_counter()
+        csv_path = to_csv(paths["eeg"], n_jobs=args.jobs)
+        results.append(("to_csv", time.perf_counter() - t0, csv_path))
+
+        print(f"{args.minutes} min x {args.chans} channels at {args.sfreq} Hz ({mb:.1f} MB of float32)")
+        print(f"{'export':>12} {'time (s)':>10} {'MB/s':>10} {'size (MB)':>10}")
+        for name, secs, path in results:
+            print(f"{name:>12} {secs:>10.3f} {mb / secs:>10.1f} {os.path.getsize(path) / 1e6:>10.1f}")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Throughput of chunk-by-chunk streaming filtering and its difference to filtering the whole recording offline
+"""
+import argparse
+import time
+import numpy as np
+from scipy import signal
+from daedalus.ssvep.filters import StreamingFilter, design_bandpass, design_notch
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sfreqs", type=float, nargs="+", default=[250, 500, 1000])
+    parser.add_argument("--chans", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--chunk", type=float, default=0.1, help="chunk length in seconds")
+    args = parser.parse_args()
+
+    print(f"{'sfreq':>6} {'chans':>6} {'chunk':>6} {'us/chunk':>10} {'x realtime':>11} {'max abs diff':>13}")
+    for sfreq in args.sfreqs:
+        sos = np.vstack([design_bandpass(1, 40, sfreq), design_notch(50, sfreq)])
+        chunk = int(args.chunk * sfreq)
+        for n_chans in args.chans:
+            data = np.random.default_rng(0).standard_normal((n_chans, int(args.seconds * sfreq)))
+            filt = StreamingFilter(sos, n_chans)
+
+            t0 = time.perf_counter()
+            online = np.concatenate([filt.process(data[:, i:i + chunk]) for i in range(0, data.shape[1], chunk)],
+                                    axis=1)
+            secs = time.perf_counter() - t0
+
+            n_chunks = int(np.ceil(data.shape[1] / chunk))
+            diff = np.abs(online - signal.sosfilt(sos, data, axis=1)).max()
+            print(f"{sfreq:>6.0f} {n_chans:>6} {chunk:>6} {secs / n_chunks * 1e6:>10.1f} "
+                  f"{args.seconds / secs:>11.0f} {diff:>13.2e}")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Per-frame cost of multi-target flicker: schedule lookups against list searches, and (with psychopy) one
+ElementArrayStim draw against one ImageStim draw per target
+"""
+import argparse
+import time
+import numpy as np
+from daedalus.utils.flicker_utils import FlickerSchedule
+
+FREQS = [8., 8.6, 9.2, 9.8, 10.4, 11., 11.6, 12.2, 12.8, 13.4, 14., 14.6, 15.2, 15.8, 16.4, 17.]
+
+
+def frame_times(draw, n_frames, window):
+    """
+    Seconds spent drawing and flipping every frame.
+    """
+    times = np.empty(n_frames)
+    for frame in range(n_frames):
+        t0 = time.perf_counter()
+        draw(frame)
+        window.flip()
+        times[frame] = time.perf_counter() - t0
+
+    return times
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--targets", type=int, default=12)
+    parser.add_argument("--refresh", type=float, default=240)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--headless", action="store_true", help="render offscreen with pyglet's EGL backend")
+    parser.add_argument("--no-gl", action="store_true", help="only time the schedule lookups")
+    args = parser.parse_args()
+
+    freqs = FREQS[:args.targets]
+    n_frames = int(args.seconds * args.refresh)
+    budget = 1 / args.refresh
+
+    schedule = FlickerSchedule(freqs, n_frames, args.refresh)
+    on_lists = [list(schedule.on_frames(i)) for i in range(len(freqs))]
+
+    t0 = time.perf_counter()
+    for frame in range(n_frames):
+        [frame in on for on in on_lists]
+    list_secs = (time.perf_counter() - t0) / n_frames
+
+    t0 = time.perf_counter()
+    for frame in range(n_frames):
+        schedule.opacities(frame)
+    table_secs = (time.perf_counter() - t0) / n_frames
+
+    print(f"{len(freqs)} targets, {n_frames} frames at {args.refresh:.0f} Hz ({budget * 1e3:.2f} ms budget)")
+    print(f"{'list search':>16}: {list_secs * 1e6:>9.1f} us/frame")
+    print(f"{'schedule lookup':>16}: {table_secs * 1e6:>9.1f} us/frame")
+
+    if args.no_gl:
+        raise SystemExit
+
+    if args.headless:
+        import pyglet
+        pyglet.options["headless"] = True
+
+    from psychopy import visual
+    from daedalus.utils.stim_utils import FlickerArray
+
+    win = visual.Window(size=(800, 600), units="pix", fullscr=False, waitBlanking=False, checkTiming=False)
+    xys = [(-300 + 200 * (i % 4), 200 - 100 * (i // 4)) for i in range(len(freqs))]
+    texture = np.ones((64, 64))
+
+    images = [visual.ImageStim(win, image=texture, pos=xy, size=80) for xy in xys]
+
+    def draw_images(frame):
+        for stim, opacity in zip(images, schedule.opacities(frame)):
+            stim.opacity = opacity
+            stim.draw()
+
+    array = FlickerArray(win, xys, schedule, sizes=80, tex=texture)
+
+    print(f"{'':>16}  {'mean ms':>8} {'p99 ms':>8} {'over budget':>12}")
+    for name, draw in (("ImageStim x n", draw_images), ("FlickerArray", array.draw)):
+        times = frame_times(draw, n_frames, win)
+        print(f"{name:>16}: {times.mean() * 1e3:>8.3f} {np.percentile(times, 99) * 1e3:>8.3f} "
+              f"{np.count_nonzero(times > budget):>12}")
+
+    win.close()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Compares data_utils.to_pandas with the parallel load_sessions on a synthetic corpus of subject files
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from daedalus.analysis.data_utils import read_files, to_pandas, load_sessions
+
+
+def make_corpus(path, n_subjects, n_trials):
+    """
+    Writes one psychophysics-like csv file per subject
+    """
+    rng = np.random.default_rng(0)
+    for subj in range(n_subjects):
+        pd.DataFrame({
+            "participant": f"s{subj:03d}",
+            "date": "2020_Aug_05_1200",
+            "condition": rng.choice(["devalois", "double_drift", "control"], n_trials),
+            "TrialNumber": np.arange(n_trials),
+            "ran": 1,
+            "order": np.arange(n_trials),
+            "rt": rng.gamma(2, .2, n_trials),
+            "correct": rng.integers(0, 2, n_trials),
+            "contrast": rng.uniform(0, 1, n_trials),
+        }).to_csv(os.path.join(path, f"s{subj:03d}.csv"), index=False)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subjects", type=int, default=200)
+    parser.add_argument("--trials", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_corpus(tmp, args.subjects, args.trials)
+        files = read_files("psyc", known_path=tmp)
+
+        t0 = time.perf_counter()
+        old = to_pandas(files)
+        t1 = time.perf_counter()
+        new = load_sessions(files, dtype={"rt": np.float32, "contrast": np.float32, "correct": np.int8},
+                            usecols=["participant", "condition", "TrialNumber", "rt", "correct", "contrast"],
+                            n_jobs=args.jobs)
+        t2 = time.perf_counter()
+
+        print(f"{args.subjects} files x {args.trials} trials")
+        print(f"{'loader':>14} {'time (s)':>10} {'memory (MB)':>12}")
+        print(f"{'to_pandas':>14} {t1 - t0:>10.2f} {old.memory_usage(deep=True).sum() / 1e6:>12.1f}")
+        print(f"{'load_sessions':>14} {t2 - t1:>10.2f} {new.memory_usage(deep=True).sum() / 1e6:>12.1f}")
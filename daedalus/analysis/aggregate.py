@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Per-subject/condition summaries computed chunk by chunk, without loading the whole dataset
+"""
+import numpy as np
+import pandas as pd
+from daedalus.analysis.cleaning import read_chunks
+
+
+class ChunkedAggregator:
+    """
+    Keeps running counts, means and variances of some columns per group and updates them one chunk at a time.
+
+    Every chunk is summarized with vectorized groupby aggregations and merged into the running state with the
+    parallel form of Welford's algorithm (Chan et al.), so the result is the same as computing it on the whole frame
+    (up to floating point rounding) while only one chunk is ever in memory::
+
+        agg = ChunkedAggregator(values=["rt"], hit="correct")
+        for chunk in read_chunks(read_files("psyc")):
+            agg.update(chunk)
+        summary = agg.result()
+
+    Parameters
+    ----------
+    by : list
+        columns to group by.
+
+    values : list
+        numeric columns to summarize. Non-numeric entries (e.g. "--") are treated as missing.
+
+    hit : str
+        column of 1/0 (or True/False) outcomes whose hit rate is computed.
+    """
+
+    def __init__(self, by=("participant", "condition"), values=(), hit: str = None) -> None:
+
+        self.by = list(by)
+        self.values = list(values)
+        self.hit = hit
+        self._columns = self.values + ([hit] if hit is not None else [])
+
+        # running state per group: count, mean and sum of squared deviations of every column, plus hits
+        self.count = None
+        self.mean = None
+        self.m2 = None
+        self.hits = None
+
+    def __len__(self) -> int:
+        return 0 if self.count is None else len(self.count)
+
+    def update(self, chunk: pd.DataFrame) -> "ChunkedAggregator":
+        """
+        Adds a chunk of rows.
+        """
+        missing = [col for col in self.by if col not in chunk]
+        if missing:
+            raise KeyError("Chunk doesn't have the group columns {}.".format(", ".join(missing)))
+
+        data = chunk[self.by].copy()
+        for col in self._columns:
+            data[col] = pd.to_numeric(chunk[col], errors="coerce") if col in chunk else np.nan
+
+        grouped = data.groupby(self.by, observed=True, sort=False)
+        count = grouped[self._columns].count()
+        mean = grouped[self._columns].mean()
+        m2 = grouped[self._columns].var(ddof=0) * count
+        hits = grouped[self.hit].sum() if self.hit is not None else None
+
+        self._merge(count, mean, m2, hits)
+
+        return self
+
+    def merge(self, other: "ChunkedAggregator") -> "ChunkedAggregator":
+        """
+        Adds the state of another aggregator over the same columns, e.g. one that went through other files.
+        """
+        if other.count is not None:
+            self._merge(other.count, other.mean, other.m2, other.hits)
+
+        return self
+
+    def result(self, ddof: int = 1) -> pd.DataFrame:
+        """
+        Summary table, one row per group.
+
+        Parameters
+        ----------
+        ddof : int
+            delta degrees of freedom of the variances, 1 (the sample variance, like pandas) by default.
+
+        Returns
+        -------
+        pd.DataFrame
+            {column}_count, {column}_mean and {column}_var for every value column, and n_trials, hits and hit_rate
+            if a hit column was given.
+        """
+        if self.count is None:
+            return pd.DataFrame()
+
+        out = {}
+        for col in self.values:
+            n = self.count[col]
+            out[col + "_count"] = n
+            out[col + "_mean"] = self.mean[col].where(n > 0)
+            out[col + "_var"] = (self.m2[col] / (n - ddof)).where(n > ddof)
+
+        if self.hit is not None:
+            n = self.count[self.hit]
+            out["n_trials"] = n
+            out["hits"] = self.hits
+            out["hit_rate"] = (self.hits / n).where(n > 0)
+
+        return pd.DataFrame(out).sort_index()
+
+    def to_dict(self) -> dict:
+        """
+        State as plain lists, so it can be stored as JSON and put back with from_dict().
+        """
+        if self.count is None:
+            groups = []
+        else:
+            groups = [list(key) if isinstance(key, tuple) else [key] for key in self.count.index]
+
+        def column(frame, col):
+            return [] if frame is None else [None if np.isnan(v) else float(v) for v in frame[col]]
+
+        return {
+            "by": self.by,
+            "values": self.values,
+            "hit": self.hit,
+            "groups": [[_plain(v) for v in key] for key in groups],
+            "count": {col: column(self.count, col) for col in self._columns},
+            "mean": {col: column(self.mean, col) for col in self._columns},
+            "m2": {col: column(self.m2, col) for col in self._columns},
+            "hits": [] if self.hits is None else [float(v) for v in self.hits]
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "ChunkedAggregator":
+        """
+        Rebuilds an aggregator saved with to_dict().
+        """
+        agg = cls(state["by"], state["values"], state["hit"])
+        if not state["groups"]:
+            return agg
+
+        index = pd.MultiIndex.from_tuples([tuple(key) for key in state["groups"]], names=agg.by)
+        if len(agg.by) == 1:
+            index = index.get_level_values(0)
+
+        def frame(name):
+            return pd.DataFrame({col: np.array(state[name][col], dtype=np.float64) for col in agg._columns},
+                                index=index)
+
+        agg.count = frame("count")
+        agg.mean = frame("mean").fillna(0.)
+        agg.m2 = frame("m2").fillna(0.)
+        if agg.hit is not None:
+            agg.hits = pd.Series(state["hits"], index=index, dtype=np.float64)
+
+        return agg
+
+    def _merge(self, count, mean, m2, hits) -> None:
+        """
+        Combines the running state with the state of another set of rows, all groups at once.
+        """
+        mean = mean.fillna(0.)
+        m2 = m2.fillna(0.)
+
+        if self.count is None:
+            self.count, self.mean, self.m2, self.hits = count.astype(np.float64), mean, m2, hits
+            return
+
+        index = self.count.index.union(count.index, sort=False)
+        n_a = self.count.reindex(index, fill_value=0.)
+        n_b = count.reindex(index, fill_value=0.)
+        mean_a = self.mean.reindex(index, fill_value=0.)
+        mean_b = mean.reindex(index, fill_value=0.)
+
+        n = n_a + n_b
+        safe_n = n.where(n > 0, 1.)
+        delta = mean_b - mean_a
+
+        self.mean = mean_a + delta * n_b / safe_n
+        self.m2 = (self.m2.reindex(index, fill_value=0.) + m2.reindex(index, fill_value=0.)
+                   + delta ** 2 * n_a * n_b / safe_n)
+        self.count = n
+        if self.hit is not None:
+            self.hits = self.hits.reindex(index, fill_value=0.) + hits.reindex(index, fill_value=0.)
+
+
+def aggregate_files(files, by=("participant", "condition"), values=(), hit: str = None, chunksize: int = 100000,
+                    pipeline=None, **kwargs) -> pd.DataFrame:
+    """
+    Summaries of all session files, read in row chunks so the pooled data is never in memory.
+
+    Parameters
+    ----------
+    files : list
+        csv files, e.g. from read_files().
+
+    by : list
+        columns to group by.
+
+    values : list
+        numeric columns to summarize.
+
+    hit : str
+        column of 1/0 outcomes whose hit rate is computed.
+
+    chunksize : int
+        rows per chunk.
+
+    pipeline : daedalus.analysis.cleaning.CleaningPipeline
+        cleaning applied to every chunk first, e.g. cleaning.default_pipeline().
+
+    kwargs
+        passed to pd.read_csv.
+
+    Returns
+    -------
+    pd.DataFrame
+        see ChunkedAggregator.result().
+    """
+    agg = ChunkedAggregator(by, values, hit)
+    for chunk in read_chunks(files, chunksize, **kwargs):
+        if pipeline is not None:
+            chunk = pipeline.run(chunk)[0]
+        agg.update(chunk)
+
+    return agg.result()
+
+
+def _plain(value):
+    """
+    Numpy scalars as python ones, for JSON.
+    """
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Binary cache of session files so they're only parsed once
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import time
+import pandas as pd
+
+# feather keeps the columns (and categoricals) as they are and loads fastest, pickle needs nothing extra
+CACHE_FORMAT = "feather" if importlib.util.find_spec("pyarrow") else "pickle"
+
+
+class SessionCache:
+    """
+    Keeps a columnar binary copy of every session csv the first time it's loaded and serves later loads from it.
+
+    Entries are keyed by the file's path, modification time and size (or by its content with `by_content`), plus
+    the arguments it was read with, so a changed file or different dtypes/usecols are read again. When the cache
+    grows past `max_bytes` the least recently used entries are removed.
+
+    Parameters
+    ----------
+    cache_dir : str
+        where cached files and the index live. "data/.cache" under the current directory by default.
+
+    max_bytes : int
+        size limit of the cache on disk.
+
+    by_content : bool
+        key entries by a hash of the file content instead of its modification time and size.
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = 2 ** 30, by_content: bool = False) -> None:
+
+        self.cache_dir = cache_dir or os.path.join(os.getcwd(), "data", ".cache")
+        self.max_bytes = max_bytes
+        self.by_content = by_content
+        self.stats = {"hits": 0, "misses": 0, "warm_time": 0., "cold_time": 0.}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index_path = os.path.join(self.cache_dir, "index.json")
+        self._index = {}
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                self._index = json.load(f)
+
+    @property
+    def size(self) -> int:
+        """
+        Bytes used by the cached files.
+        """
+        return sum(entry["size"] for entry in self._index.values())
+
+    def key(self, path: str, **kwargs) -> str:
+        """
+        Cache key of a file read with the given pd.read_csv arguments.
+        """
+        path = os.path.abspath(path)
+        h = hashlib.sha1(path.encode())
+
+        if self.by_content:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(2 ** 20), b""):
+                    h.update(block)
+        else:
+            h.update(_stat(path).encode())
+
+        h.update(_args(kwargs).encode())
+
+        return h.hexdigest()
+
+    def load(self, path: str, **kwargs) -> pd.DataFrame:
+        """
+        Reads a session file, from the cache if possible.
+
+        Parameters
+        ----------
+        path : str
+            csv file.
+
+        kwargs
+            passed to pd.read_csv on a miss.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        t0 = time.perf_counter()
+        key = self.key(path, **kwargs)
+        entry = self._index.get(key)
+        cached_file = os.path.join(self.cache_dir, key + "." + CACHE_FORMAT)
+
+        if entry is not None and os.path.exists(cached_file):
+            df = self._read(cached_file)
+
+            # only kept in memory until the next miss or save(), hits shouldn't pay for rewriting the index
+            entry["last_used"] = time.time()
+
+            self.stats["hits"] += 1
+            self.stats["warm_time"] += time.perf_counter() - t0
+            return df
+
+        df = pd.read_csv(path, **kwargs)
+
+        # copies of an older version of the file can't be hit anymore, whatever they were read with. Copies of
+        # this version read with other arguments are left alone
+        args, stat = _args(kwargs), _stat(path)
+        self._drop(path, args, stat)
+
+        self._write(df, cached_file)
+        self._index[key] = {
+            "source": os.path.abspath(path),
+            "stat": stat,
+            "args": args,
+            "size": os.path.getsize(cached_file),
+            "last_used": time.time()
+        }
+        self.evict()
+        self.save()
+
+        self.stats["misses"] += 1
+        self.stats["cold_time"] += time.perf_counter() - t0
+        return df
+
+    def invalidate(self, path: str = None) -> None:
+        """
+        Removes the cached copies of a file, or everything if no path is given.
+        """
+        self._drop(path)
+        self.save()
+
+    def evict(self) -> None:
+        """
+        Removes least recently used entries until the cache fits in max_bytes.
+        """
+        size = self.size
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_used"]):
+            if size <= self.max_bytes:
+                break
+            size -= self._index[key]["size"]
+            self._remove(key)
+
+    def report(self) -> str:
+        """
+        Number of cold (parsed) and warm (cached) loads and their average time.
+        """
+        lines = []
+        for kind, count, total in (("cold", self.stats["misses"], self.stats["cold_time"]),
+                                   ("warm", self.stats["hits"], self.stats["warm_time"])):
+            avg = total / count * 1000 if count else 0.
+            lines.append(f"{kind}: {count} loads, {total:.3f} s total, {avg:.1f} ms per file")
+
+        return "\n".join(lines)
+
+    def save(self) -> None:
+        """
+        Writes the index (with the last use of every entry) to disk.
+        """
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _drop(self, path: str = None, args: str = None, stat: str = None) -> None:
+        """
+        Removes entries of a file without saving the index: all of them, or (given `args` and `stat`) the ones read
+        with `args` and the ones of another version of the file.
+        """
+        source = os.path.abspath(path) if path is not None else None
+        for key, entry in list(self._index.items()):
+            if source is not None and entry["source"] != source:
+                continue
+            # entries from before the stat and arguments were kept can't be told apart, they go too
+            if args is not None and entry.get("stat") == stat and entry.get("args", args) != args:
+                continue
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        self._index.pop(key)
+        cached_file = os.path.join(self.cache_dir, key + "." + CACHE_FORMAT)
+        if os.path.exists(cached_file):
+            os.remove(cached_file)
+
+    @staticmethod
+    def _read(cached_file: str) -> pd.DataFrame:
+        if CACHE_FORMAT == "feather":
+            return pd.read_feather(cached_file)
+        return pd.read_pickle(cached_file)
+
+    @staticmethod
+    def _write(df: pd.DataFrame, cached_file: str) -> None:
+        if CACHE_FORMAT == "feather":
+            df.to_feather(cached_file)
+        else:
+            df.to_pickle(cached_file)
+
+
+def _stat(path: str) -> str:
+    """
+    Modification time and size of a file, the version of it an entry was made from.
+    """
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _args(kwargs: dict) -> str:
+    """
+    pd.read_csv arguments as they go into the cache key.
+    """
+    return repr(sorted(kwargs.items()))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Declarative cleaning of psychophysics data frames
+"""
+import numpy as np
+import pandas as pd
+
+
+class CleaningPipeline:
+    """
+    Collects cleaning steps and runs them all in one pass over a frame.
+
+    Steps are only recorded when they're added. run() combines every row filter into one boolean mask and every
+    column drop into one column selection, so the frame is copied once no matter how many steps there are::
+
+        pipeline = (CleaningPipeline()
+                    .replace("--", np.nan)
+                    .keep_rows("ran", 1)
+                    .extract(["participant", "date"])
+                    .drop_columns(["ran", "date"])
+                    .drop_columns(["order"], requires="TrialNumber"))
+        clean, subj_dates = pipeline.run(df)
+
+    Use run_chunks() for data that doesn't fit in memory.
+    """
+
+    def __init__(self) -> None:
+
+        self._replacements = {}
+        self._row_filters = []
+        self._drops = []
+        self._extract = []
+
+    def replace(self, value, new_value=np.nan) -> "CleaningPipeline":
+        """
+        Replaces a placeholder value (e.g. psychopy's "--") everywhere.
+        """
+        self._replacements[value] = new_value
+        return self
+
+    def keep_rows(self, column: str, value=None, condition=None) -> "CleaningPipeline":
+        """
+        Keeps rows where `column` equals `value`, or where `condition(column values)` is True.
+
+        Parameters
+        ----------
+        column : str
+
+        value
+            value the rows have to have.
+
+        condition : callable
+            vectorized test on the column (a pd.Series) returning a boolean Series, instead of `value`.
+        """
+        if condition is None:
+            condition = _equals(value)
+        self._row_filters.append((column, condition))
+        return self
+
+    def drop_columns(self, columns: list, requires: str = None) -> "CleaningPipeline":
+        """
+        Removes columns (the ones that exist).
+
+        Parameters
+        ----------
+        columns : list
+
+        requires : str
+            only drop them if this column is in the frame, e.g. "order" is only useless when there's a TrialNumber.
+        """
+        self._drops.append((list(columns), requires))
+        return self
+
+    def extract(self, columns: list) -> "CleaningPipeline":
+        """
+        Returns the unique combinations of these columns (e.g. participant and date) next to the cleaned frame, from
+        the rows that were kept. They're taken before any column is dropped.
+        """
+        self._extract = list(columns)
+        return self
+
+    def run(self, df: pd.DataFrame) -> tuple:
+        """
+        Cleans a frame.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+
+        Returns
+        -------
+        tuple
+            the cleaned frame and a frame of the unique extracted values (empty if nothing was extracted).
+        """
+        mask = np.ones(len(df), dtype=bool)
+        for column, condition in self._row_filters:
+            if column in df:
+                mask &= np.asarray(condition(df[column]), dtype=bool)
+
+        dropped = set()
+        for columns, requires in self._drops:
+            if requires is None or requires in df:
+                dropped.update(columns)
+        keep = [col for col in df.columns if col not in dropped]
+
+        extract = [col for col in self._extract if col in df]
+        extracted = df.loc[mask, extract].drop_duplicates().reset_index(drop=True)
+
+        # the one copy of the data, the replacements are made in it rather than in another copy
+        clean = df.loc[mask, keep]
+        if self._replacements:
+            clean.replace(self._replacements, inplace=True)
+
+        return clean.reset_index(drop=True), extracted
+
+    def run_chunks(self, chunks):
+        """
+        Cleans frames one at a time, e.g. from pd.read_csv(..., chunksize=n) or read_chunks().
+
+        Parameters
+        ----------
+        chunks : iterable
+            of pd.DataFrame.
+
+        Yields
+        ------
+        tuple
+            cleaned chunk and the values extracted from it.
+        """
+        for chunk in chunks:
+            yield self.run(chunk)
+
+
+def _equals(value):
+    """
+    Vectorized equality test that also matches values that were read as strings (e.g. ran == "1").
+    """
+    def condition(col: pd.Series) -> pd.Series:
+        if col.dtype == object or pd.api.types.is_string_dtype(col):
+            return col.astype(str) == str(value)
+        return col == value
+
+    return condition
+
+
+def default_pipeline() -> CleaningPipeline:
+    """
+    The cleaning every psychophysics frame goes through: "--" becomes NaN, trials that didn't run are dropped,
+    subject/date pairs are extracted and the bookkeeping columns are removed.
+    """
+    return (CleaningPipeline()
+            .replace("--", np.nan)
+            .keep_rows("ran", 1)
+            .extract(["participant", "date"])
+            .drop_columns(["ran", "date"])
+            .drop_columns(["order"], requires="TrialNumber"))
+
+
+def read_chunks(files, chunksize: int = 100000, **kwargs):
+    """
+    Reads files in row chunks so they never have to be in memory at once.
+
+    Parameters
+    ----------
+    files : list
+        csv files.
+
+    chunksize : int
+        rows per chunk.
+
+    kwargs
+        passed to pd.read_csv.
+
+    Yields
+    ------
+    pd.DataFrame
+    """
+    for path in files:
+        with pd.read_csv(path, chunksize=chunksize, **kwargs) as reader:
+            for chunk in reader:
+                yield chunk
@@ -8,8 +8,12 @@ DESCRIPTION
 """
 import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import os
 import glob
+import tempfile
+from daedalus.analysis.cleaning import default_pipeline
 
 
 def read_files(file_type, known_path=""):
@@ -43,13 +47,14 @@ def read_files(file_type, known_path=""):
     return data_files
 
 
-def to_pandas(files):
+def to_pandas(files, cache=None):
     """
     Puts all files in a pandas dataframe
 
     Parameters
     ----------
     files: (list) containing strings of all data files
+    cache: (SessionCache) serves files that were read before from their binary copy
 
     Returns
     -------
@@ -57,7 +62,11 @@ def to_pandas(files):
     """
 
     # go through the input list of paths and add the read the data with pandas and add subjects' dfs to a list
-    pd_lst = [pd.read_csv(subj_frame, index_col=None, header=0) for subj_frame in files]
+    if cache is None:
+        pd_lst = [pd.read_csv(subj_frame, index_col=None, header=0) for subj_frame in files]
+    else:
+        pd_lst = [cache.load(subj_frame, index_col=None, header=0) for subj_frame in files]
+        cache.save()
 
     # merge all the individual subject dfs into one big df
     df = pd.concat(pd_lst, axis=0, ignore_index=True, sort=False)
@@ -65,33 +74,206 @@ def to_pandas(files):
     return df
 
 
+def load_sessions(files, dtype=None, usecols=None, categories=("participant", "condition"), n_jobs=None):
+    """
+    Reads subject files in parallel worker processes and puts them in one compact dataframe
+
+    Peak memory stays at about the size of the result plus one session: every worker writes the session it parsed
+    to a temporary file and only sends back its length and column types, the columns of the result are allocated
+    once and the sessions are copied into them one at a time
+
+    Parameters
+    ----------
+    files: (list) containing strings of all data files
+    dtype: (dict) column types passed to pd.read_csv, saves pandas from guessing them
+    usecols: (list) columns to keep, columns missing from a file are skipped
+    categories: (tuple) columns stored as categoricals (e.g. participant and condition)
+    n_jobs: (int) number of worker processes, all cores by default
+
+    Returns
+    -------
+    df: (Pandas.DataFrame) raw data of all subjects
+    """
+    files = list(files)
+    if not files:
+        return pd.DataFrame()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_paths = [os.path.join(tmp_dir, "{}.pkl".format(i)) for i in range(len(files))]
+
+        # every worker downcasts its frame so the big object columns never exist in this process
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            sessions = list(pool.map(_read_session, files, tmp_paths, repeat(dtype), repeat(usecols),
+                                     repeat(categories)))
+
+        n_rows = sum(session["n_rows"] for session in sessions)
+        columns = list(dict.fromkeys(col for session in sessions for col in session["dtypes"]))
+        sinks = {col: _ColumnSink([session["dtypes"].get(col) for session in sessions], n_rows)
+                 for col in columns}
+
+        start = 0
+        for session, tmp_path in zip(sessions, tmp_paths):
+            frame = pd.read_pickle(tmp_path)
+            os.remove(tmp_path)
+
+            stop = start + session["n_rows"]
+            for col, sink in sinks.items():
+                sink.fill(start, stop, frame[col] if col in frame else None)
+            start = stop
+            del frame
+
+    df = pd.DataFrame({col: sinks.pop(col).result() for col in columns}, copy=False)
+
+    return df
+
+
+def _read_session(path, tmp_path, dtype, usecols, categories):
+    """
+    Reads one subject file for load_sessions(), writes it to tmp_path and returns its length and column types
+    """
+    if usecols is not None:
+        wanted = set(usecols)
+        usecols = wanted.__contains__
+
+    df = pd.read_csv(path, index_col=None, header=0, dtype=dtype, usecols=usecols)
+
+    for col in categories:
+        if col in df:
+            df[col] = df[col].astype("category")
+
+    df.to_pickle(tmp_path)
+
+    return {"n_rows": len(df), "dtypes": dict(df.dtypes)}
+
+
+class _ColumnSink:
+    """
+    One column of load_sessions()' result, allocated for all rows up front and filled a session at a time
+
+    The column keeps the sessions' type if they agree. Categoricals get the union of all categories, numbers the
+    common type (float64 if some sessions don't have the column, it's NaN there), anything else is object
+    """
+
+    def __init__(self, dtypes, n_rows):
+        present = [dt for dt in dtypes if dt is not None]
+        complete = len(present) == len(dtypes)
+        numpy_types = all(isinstance(dt, np.dtype) for dt in present)
+
+        self.categories = None
+        self.dtype = None
+
+        if all(isinstance(dt, pd.CategoricalDtype) for dt in present):
+            # categories in the order the sessions bring them in, like union_categoricals
+            self.categories = pd.Index(list(dict.fromkeys(c for dt in present for c in dt.categories)))
+            self.values = np.full(n_rows, -1, dtype=np.min_scalar_type(-len(self.categories) - 1))
+        elif numpy_types and complete and all(dt == present[0] for dt in present):
+            self.values = np.empty(n_rows, dtype=present[0])
+        elif numpy_types and all(dt.kind in "iuf" for dt in present):
+            if complete:
+                self.values = np.empty(n_rows, dtype=np.result_type(*present))
+            else:
+                self.values = np.full(n_rows, np.nan, dtype=np.result_type(np.float64, *present))
+        else:
+            # strings, mixed types and gaps in non-numeric columns. Extension types (e.g. str) all sessions share
+            # are restored in result()
+            self.values = np.full(n_rows, np.nan, dtype=object)
+            if complete and all(dt == present[0] for dt in present):
+                self.dtype = present[0]
+
+    def fill(self, start, stop, column):
+        """
+        Copies one session's column (None if the session doesn't have it) into rows [start, stop)
+        """
+        if column is None:
+            return
+
+        if self.categories is not None:
+            # the session's codes in the union's categories, the -1 (missing) code stays -1
+            mapping = np.append(self.categories.get_indexer(column.cat.categories), -1)
+            self.values[start:stop] = mapping[column.cat.codes.to_numpy()]
+        elif self.values.dtype.kind == "f":
+            self.values[start:stop] = column.to_numpy(dtype=self.values.dtype, na_value=np.nan)
+        else:
+            self.values[start:stop] = column.to_numpy()
+
+    def result(self):
+        """
+        The filled column
+        """
+        if self.categories is not None:
+            return pd.Categorical.from_codes(self.values, categories=self.categories)
+        if self.dtype is not None:
+            return pd.array(self.values, dtype=self.dtype)
+
+        return self.values
+
+
 def basic_prep(df, save=False):
     """
-    Initial preprocessing including replacing missing values,
+    Initial preprocessing: replaces missing values ("--") with NaNs, removes trials that didn't run, pulls out the
+    subject/date pairs and removes the ran, date and order columns. All of it happens in one pass over the frame
+    (see cleaning.default_pipeline)
 
     Parameters
     ----------
     df: (Pandas.DataFrame) dataframe we want to preprocess
+    save: (bool) also write the preprocessed data to "current_dir/data/prep/prep_data.csv"
 
     Returns
     -------
     prep_df: (Pandas.DataFrame) preprocessed dataframe!
+    subj_dates: (list) (participant, date) tuples of all sessions
+    """
+    prep_df, extracted = default_pipeline().run(df)
+    subj_dates = list(extracted.itertuples(index=False, name=None))
+
+    if save:
+        prep_df.to_csv(_prep_path(), index=False)
+
+    return prep_df, subj_dates
+
+
+def basic_prep_chunks(chunks, out_path=None):
+    """
+    Same as basic_prep but for data that doesn't fit in memory, the chunks are cleaned one by one and appended to a csv.
+    All chunks are written in the columns of the first one, a chunk with columns it doesn't have raises a ValueError
+
+    Parameters
+    ----------
+    chunks: (iterable) of Pandas.DataFrame, e.g. cleaning.read_chunks(files)
+    out_path: (string) where the preprocessed data goes, "current_dir/data/prep/prep_data.csv" by default
+
+    Returns
+    -------
+    subj_dates: (list) (participant, date) tuples of all sessions
     """
-    # replace missing values with NaNs
-    df = df.replace(to_replace="--", value=np.nan)
+    out_path = out_path or _prep_path()
+    subj_dates = {}
 
-    # if there's a date column save the dates and subject-names as tuples in a list and get rid of it
-    subj_dates = []
+    # the header comes from the first chunk, later ones are written in its column order so values stay under the
+    # right column. Columns a session doesn't have are left empty, columns the header doesn't have can't be written
+    columns = None
+    for prep_chunk, extracted in default_pipeline().run_chunks(chunks):
+        if columns is None:
+            columns = list(prep_chunk.columns)
+            prep_chunk.to_csv(out_path, mode="w", header=True, index=False)
+        else:
+            extra = [col for col in prep_chunk.columns if col not in columns]
+            if extra:
+                raise ValueError("Columns {} aren't in the header of {}: {}".format(extra, out_path, columns))
+            prep_chunk.reindex(columns=columns).to_csv(out_path, mode="a", header=False, index=False)
 
-    for idx, date in df.date.unique():
-        subj_dates.append((df["participant"][idx]), date)
+        # dict keeps the order the sessions were seen in
+        subj_dates.update(dict.fromkeys(extracted.itertuples(index=False, name=None)))
 
-    df = df[~df["date"]]
+    return list(subj_dates)
 
-    # remove the trials that did not run successfully and remove the ran column
-    df = df[df["ran"] == 1]
-    df = df[~df["ran"]]
 
-    # remove the order column (useless if we have TrialNumber)
-    if df["TrialNumber"]:
-        df = df[~df["order"]]
\ No newline at end of file
+def _prep_path():
+    """
+    Default location of the preprocessed data
+    """
+    prep_dir = os.path.join(os.getcwd(), "data", "prep")
+    os.makedirs(prep_dir, exist_ok=True)
+
+    return os.path.join(prep_dir, "prep_data.csv")
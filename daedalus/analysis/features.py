@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Offline epoching of saved EEG recordings and SSVEP features (SNR at the flicker frequencies)
+"""
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+import pandas as pd
+from daedalus.analysis.cache import CACHE_FORMAT
+from daedalus.ssvep.export import events_path
+
+
+def find_recordings(known_path: str = "") -> list:
+    """
+    Raw FIF files written by lsl_stream.save_data or ChunkedWriter.finalize
+
+    Parameters
+    ----------
+    known_path: (string) folder of the recordings, "current_dir/data/eeg" by default
+
+    Returns
+    -------
+    files: (list) paths of the *_raw.fif files
+    """
+    data_path = known_path or os.path.join(os.getcwd(), "data", "eeg")
+
+    return sorted(glob.glob(os.path.join(data_path, "*_raw.fif")))
+
+
+def epoch_data(data, events, sfreq: float, tmin: float, tmax: float, event_id=None, first_samp: int = 0) -> tuple:
+    """
+    Cuts epochs around events with a single fancy index, no copy per epoch.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        (n_channels, n_samples) recording.
+
+    events : numpy.ndarray
+        MNE events array.
+
+    sfreq : float
+        sampling rate.
+
+    tmin, tmax : float
+        epoch start and end relative to the events, in seconds (tmax excluded).
+
+    event_id : list
+        event codes to keep, all by default.
+
+    first_samp : int
+        sample number of the first column of `data` (raw.first_samp, or where a partial read started).
+
+    Returns
+    -------
+    tuple
+        (n_epochs, n_channels, n_times) epochs and the events they belong to. Events whose epoch doesn't fit in
+        the recording are left out.
+    """
+    starts, events, n_times = epoch_windows(events, sfreq, tmin, tmax, data.shape[1], event_id, first_samp)
+
+    epochs = data[:, starts[:, None] + np.arange(n_times)]
+
+    return epochs.transpose(1, 0, 2), events
+
+
+def epoch_windows(events, sfreq: float, tmin: float, tmax: float, n_samples: int, event_id=None,
+                  first_samp: int = 0) -> tuple:
+    """
+    Where the epochs around events are in a recording, without touching its data.
+
+    Parameters
+    ----------
+    events : numpy.ndarray
+        MNE events array.
+
+    sfreq : float
+        sampling rate.
+
+    tmin, tmax : float
+        epoch start and end relative to the events, in seconds (tmax excluded).
+
+    n_samples : int
+        length of the recording.
+
+    event_id : list
+        event codes to keep, all by default.
+
+    first_samp : int
+        sample number of the recording's first sample.
+
+    Returns
+    -------
+    tuple
+        first sample of every epoch (counted from the start of the recording), the events they belong to and the
+        number of samples per epoch. Events whose epoch doesn't fit in the recording are left out.
+    """
+    events = np.asarray(events, dtype=np.int64).reshape(-1, 3)
+    if event_id is not None:
+        events = events[np.isin(events[:, 2], list(event_id))]
+
+    n_times = int(round((tmax - tmin) * sfreq))
+    starts = events[:, 0] - first_samp + int(round(tmin * sfreq))
+    fits = (starts >= 0) & (starts + n_times <= n_samples)
+
+    return starts[fits], events[fits], n_times
+
+
+def snr_spectrum(epochs, sfreq: float, n_fft: int = None, n_neighbors: int = 10, skip: int = 1) -> tuple:
+    """
+    Power spectra of all epochs and channels from one batched FFT, and their SNR: the power at every frequency bin
+    over the mean power of the `n_neighbors` bins on each side of it (leaving out `skip` bins right next to it).
+
+    Parameters
+    ----------
+    epochs : numpy.ndarray
+        (..., n_times) data, e.g. (n_epochs, n_channels, n_times).
+
+    sfreq : float
+        sampling rate.
+
+    n_fft : int
+        FFT length, the epoch length by default. Longer zero-pads for a finer frequency grid.
+
+    n_neighbors : int
+        bins on each side averaged for the noise estimate.
+
+    skip : int
+        bins on each side of the target bin left out of the noise estimate.
+
+    Returns
+    -------
+    tuple
+        (n_freqs,) frequencies, (..., n_freqs) power and (..., n_freqs) SNR.
+    """
+    epochs = np.asarray(epochs)
+    n_fft = n_fft or epochs.shape[-1]
+
+    centered = epochs - epochs.mean(axis=-1, keepdims=True)
+    power = np.abs(np.fft.rfft(centered, n=n_fft, axis=-1)) ** 2 / n_fft
+    freqs = np.fft.rfftfreq(n_fft, 1 / sfreq)
+
+    # neighbour sums of every bin from one cumulative sum
+    n_freqs = len(freqs)
+    bins = np.arange(n_freqs)
+    cum = np.concatenate([np.zeros(power.shape[:-1] + (1,)), np.cumsum(power, axis=-1)], axis=-1)
+    lo_1, hi_1 = np.clip(bins - skip - n_neighbors, 0, n_freqs), np.clip(bins - skip, 0, n_freqs)
+    lo_2, hi_2 = np.clip(bins + skip + 1, 0, n_freqs), np.clip(bins + skip + n_neighbors + 1, 0, n_freqs)
+
+    noise = cum[..., hi_1] - cum[..., lo_1] + cum[..., hi_2] - cum[..., lo_2]
+    n_noise = (hi_1 - lo_1) + (hi_2 - lo_2)
+    snr = power / np.where(noise > 0, noise / np.maximum(n_noise, 1), np.inf)
+
+    return freqs, power, snr
+
+
+def recording_features(raw_path: str, freqs, tmin: float = 0., tmax: float = 4., event_id=None,
+                       n_harmonics: int = 2, n_fft: int = None, n_neighbors: int = 10, skip: int = 1,
+                       picks=None) -> pd.DataFrame:
+    """
+    SSVEP features of one recording: SNR and power at each flicker frequency and its harmonics, per epoch and
+    channel.
+
+    Parameters
+    ----------
+    raw_path : str
+        raw FIF file from save_data or ChunkedWriter.finalize. The events are read from the event file next to it
+        (export.events_path).
+
+    freqs : list
+        flicker frequencies in Hz.
+
+    tmin, tmax : float
+        epoch window relative to the markers, in seconds.
+
+    event_id : list
+        event codes to epoch, all by default.
+
+    n_harmonics : int
+        harmonics (including the fundamental) per frequency.
+
+    n_fft, n_neighbors, skip
+        see snr_spectrum().
+
+    picks : list
+        channel names, all EEG channels by default.
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per epoch, channel, frequency and harmonic.
+    """
+    import mne
+
+    # recordings without markers have no event file
+    if not os.path.isfile(events_path(raw_path)):
+        return _empty_features()
+
+    raw = mne.io.read_raw_fif(raw_path, preload=False, verbose="error")
+    events = mne.read_events(events_path(raw_path), verbose="error")
+    sfreq = raw.info["sfreq"]
+    channels = list(picks) if picks is not None else raw.ch_names
+
+    # only the samples inside the epochs are read, one epoch at a time, so memory grows with the number of epochs
+    # and not with the length of the session
+    starts, events, n_times = epoch_windows(events, sfreq, tmin, tmax, raw.n_times, event_id, raw.first_samp)
+    if not len(starts):
+        return _empty_features()
+
+    epochs = np.empty((len(starts), len(channels), n_times), dtype=np.float32)
+    for epoch, start in zip(epochs, starts.tolist()):
+        epoch[:] = raw.get_data(picks=channels, start=start, stop=start + n_times)
+
+    spec_freqs, power, snr = snr_spectrum(epochs, sfreq, n_fft, n_neighbors, skip)
+
+    targets = np.multiply.outer(np.asarray(freqs, dtype=np.float64), np.arange(1, n_harmonics + 1)).ravel()
+    bins = np.abs(spec_freqs[:, None] - targets).argmin(axis=0)
+
+    # (n_epochs, n_channels, n_targets) -> long table
+    n_epochs, n_chans, n_targets = len(epochs), len(channels), len(targets)
+    shape = (n_epochs, n_chans, n_targets)
+    name = os.path.basename(raw_path)[:-len("_raw.fif")]
+
+    return pd.DataFrame({
+        "recording": name,
+        "participant": name.split("_session")[0],
+        "epoch": np.broadcast_to(np.arange(n_epochs)[:, None, None], shape).ravel().astype(np.int32),
+        "event": np.broadcast_to(events[:, 2, None, None], shape).ravel().astype(np.int32),
+        "channel": pd.Categorical(np.broadcast_to(np.asarray(channels)[:, None], shape).ravel()),
+        "freq": np.broadcast_to(np.repeat(freqs, n_harmonics), shape).ravel().astype(np.float32),
+        "harmonic": np.broadcast_to(np.tile(np.arange(1, n_harmonics + 1), len(freqs)), shape).ravel().astype(np.int8),
+        "power": power[..., bins].ravel().astype(np.float32),
+        "snr": snr[..., bins].ravel().astype(np.float32)
+    })
+
+
+def extract_features(files=None, freqs=(), out_path: str = None, n_jobs: int = None, **kwargs) -> pd.DataFrame:
+    """
+    Features of all recordings, one worker process per recording, in one table.
+
+    Parameters
+    ----------
+    files : list
+        raw FIF files, all of find_recordings() by default.
+
+    freqs : list
+        flicker frequencies in Hz.
+
+    out_path : str
+        where to write the table (feather, or pickle without pyarrow). Not written if not given.
+
+    n_jobs : int
+        number of worker processes, all cores by default.
+
+    kwargs
+        passed to recording_features().
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    files = find_recordings() if files is None else list(files)
+    if not files:
+        return _empty_features()
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        tables = list(pool.map(_recording_features, files, repeat(list(freqs)), repeat(kwargs)))
+
+    df = pd.concat(tables, axis=0, ignore_index=True)
+    for col in ("recording", "participant", "channel"):
+        df[col] = df[col].astype("category")
+
+    if out_path is not None:
+        if CACHE_FORMAT == "feather":
+            df.to_feather(out_path)
+        else:
+            df.to_pickle(out_path)
+
+    return df
+
+
+def _recording_features(raw_path, freqs, kwargs) -> pd.DataFrame:
+    """
+    recording_features() with keyword arguments, for the process pool
+    """
+    return recording_features(raw_path, freqs, **kwargs)
+
+
+def _empty_features() -> pd.DataFrame:
+    return pd.DataFrame(columns=["recording", "participant", "epoch", "event", "channel", "freq", "harmonic",
+                                 "power", "snr"])
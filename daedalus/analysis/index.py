@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Manifest of processed session files so analyses only go through new ones
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import pandas as pd
+from daedalus.analysis.aggregate import ChunkedAggregator
+from daedalus.analysis.cleaning import default_pipeline, read_chunks
+from daedalus.analysis.data_utils import read_files
+
+
+class AnalysisIndex:
+    """
+    Remembers which session files were summarized and keeps their per-session summaries in a JSON manifest.
+
+    update() only reads files that are new or changed (by modification time and size) since the last run and drops
+    the ones that were deleted; the pooled summaries are then merged from the stored per-session ones, which doesn't
+    need any data file::
+
+        index = AnalysisIndex("psyc", values=["rt"], hit="correct")
+        index.update()
+        summary = index.result()
+
+    If the summary settings change every file is summarized again.
+
+    Parameters
+    ----------
+    file_type : str
+        data folder, as in read_files() ("psyc" looks in "current_dir/data/psyc").
+
+    by : list
+        columns to group by.
+
+    values : list
+        numeric columns to summarize.
+
+    hit : str
+        column of 1/0 outcomes whose hit rate is computed.
+
+    clean : bool
+        run the files through cleaning.default_pipeline() first.
+
+    known_path : str
+        data folder, instead of the one under the current directory.
+
+    index_path : str
+        where the manifest is written, "{data folder}_index.json" next to the data folder by default.
+    """
+
+    def __init__(self, file_type: str, by=("participant", "condition"), values=(), hit: str = None,
+                 clean: bool = True, known_path: str = "", index_path: str = None) -> None:
+
+        self.file_type = file_type
+        self.known_path = known_path
+        self.settings = {"by": list(by), "values": list(values), "hit": hit, "clean": clean}
+
+        data_path = known_path or os.path.join(os.getcwd(), "data", file_type)
+        self.index_path = index_path or os.path.normpath(data_path) + "_index.json"
+
+        self._sessions = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                manifest = json.load(f)
+            if manifest.get("settings") == self.settings:
+                self._sessions = manifest["sessions"]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def files(self) -> list:
+        """
+        Files that have a summary.
+        """
+        return list(self._sessions)
+
+    def stale(self, files=None) -> tuple:
+        """
+        Files that need to be summarized and files that aren't there anymore.
+
+        Parameters
+        ----------
+        files : list
+            data files, all of read_files() by default.
+
+        Returns
+        -------
+        tuple
+            list of new or changed files and list of removed ones.
+        """
+        if files is None:
+            files = read_files(self.file_type, self.known_path)
+        files = [os.path.abspath(path) for path in files]
+
+        todo = [path for path in files if self._sessions.get(path, {}).get("stat") != _stat(path)]
+        removed = sorted(set(self._sessions) - set(files))
+
+        return todo, removed
+
+    def update(self, files=None, chunksize: int = 100000, n_jobs: int = None) -> list:
+        """
+        Summarizes new and changed files (in parallel worker processes), forgets removed ones and saves the
+        manifest.
+
+        Parameters
+        ----------
+        files : list
+            data files, all of read_files() by default.
+
+        chunksize : int
+            rows read at once from a file.
+
+        n_jobs : int
+            number of worker processes, all cores by default.
+
+        Returns
+        -------
+        list
+            files that were summarized.
+        """
+        todo, removed = self.stale(files)
+
+        for path in removed:
+            del self._sessions[path]
+
+        if todo:
+            s = self.settings
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                states = pool.map(_summarize, todo, repeat(s["by"]), repeat(s["values"]), repeat(s["hit"]),
+                                  repeat(s["clean"]), repeat(chunksize))
+                for path, state in zip(todo, states):
+                    self._sessions[path] = {"stat": _stat(path), "summary": state}
+
+        if todo or removed:
+            self.save()
+
+        return todo
+
+    def aggregator(self, files=None) -> ChunkedAggregator:
+        """
+        Pooled state of all summarized sessions (or only of `files`).
+        """
+        paths = self._sessions if files is None else [os.path.abspath(path) for path in files]
+
+        agg = ChunkedAggregator(self.settings["by"], self.settings["values"], self.settings["hit"])
+        for path in paths:
+            agg.merge(ChunkedAggregator.from_dict(self._sessions[path]["summary"]))
+
+        return agg
+
+    def result(self, files=None, ddof: int = 1) -> pd.DataFrame:
+        """
+        Pooled summary table, see ChunkedAggregator.result().
+        """
+        return self.aggregator(files).result(ddof)
+
+    def save(self) -> None:
+        """
+        Writes the manifest to disk.
+        """
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"settings": self.settings, "sessions": self._sessions}, f)
+        os.replace(tmp_path, self.index_path)
+
+
+def _stat(path: str) -> list:
+    """
+    What tells that a file changed: its modification time and size.
+    """
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _summarize(path, by, values, hit, clean, chunksize) -> dict:
+    """
+    Summary state of one session file for AnalysisIndex.update()
+    """
+    pipeline = default_pipeline() if clean else None
+
+    agg = ChunkedAggregator(by, values, hit)
+    for chunk in read_chunks([path], chunksize):
+        if pipeline is not None:
+            chunk = pipeline.run(chunk)[0]
+        agg.update(chunk)
+
+    return agg.to_dict()
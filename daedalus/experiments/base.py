@@ -16,6 +16,9 @@ import abc
 import platform
 from typing import Dict, List
 from daedalus.utils.misc import jitter, get_screens
+from daedalus.experiments.frames import FrameLog
+from daedalus.experiments.timeline import Timeline
+from daedalus.experiments.sequence import SessionSequence
 
 
 class BaseExperiment:
@@ -60,6 +63,8 @@ class BaseExperiment:
         self._data_paths = dict()
         self._timing = dict()
         self._handlers = dict()
+        self._frame_log = None
+        self.sequences = dict()
         self.warnings = {
             "Files": [],
             "System": []
@@ -287,6 +292,21 @@ class BaseExperiment:
 
         return self._handlers
 
+    @property
+    def frame_log(self) -> FrameLog:
+        """
+        Flip times of every frame, tagged with the trial, phase and condition. Filled by flip().
+
+        Returns
+        -------
+        FrameLog
+        """
+        if self._frame_log is None:
+
+            self._frame_log = FrameLog(self.window.monitorFramePeriod)
+
+        return self._frame_log
+
     def startup(self):
         """
         Check system status and ask which monitor to set up.
@@ -345,6 +365,108 @@ class BaseExperiment:
         # add it to the high-level experiment handler too
         self.handlers["exp"].addLoop(self.handlers[name])
 
+    def add_sequence(self, name: str, conditions: List[Dict], block_size: int = None, seed: int = None,
+                     method: str = "random") -> SessionSequence:
+        """
+        Generates every trial of a part of the session (e.g. "practice" or "main") up front: condition order,
+        jittered phase frames per trial and block boundaries. It's saved with the data by save().
+
+        Parameters
+        ----------
+        name : str
+            key of the number of repetitions under data_points in the settings.
+
+        conditions : list
+
+        block_size : int
+            trials per block.
+
+        seed : int
+            seed of the random generator, a new one is drawn and saved if not given.
+
+        method : str
+            "random", "fullRandom" or "sequential".
+
+        Returns
+        -------
+        SessionSequence
+        """
+        self.sequences[name] = SessionSequence(
+            conditions,
+            n_reps=int(self.settings.get("EXPERIMENT")["data_points"][name]),
+            durations=self.settings.get("EXPERIMENT").get("durations"),
+            refresh_rate=1 / self.window.monitorFramePeriod,
+            block_size=block_size,
+            method=method,
+            seed=seed
+        )
+
+        return self.sequences[name]
+
+    def trial_timeline(self, order: List[str] = None, rng=None) -> Timeline:
+        """
+        Compiles the phase durations in the settings (with fresh jitter) into the frames of one trial, for
+        TimelineRunner.
+
+        Parameters
+        ----------
+        order : list
+            phase names in the order they're shown, the order of the settings by default.
+
+        rng : numpy.random.Generator
+            source of the jitter.
+
+        Returns
+        -------
+        Timeline
+        """
+        durations = self.settings.get("EXPERIMENT").get("durations")
+
+        return Timeline.from_durations(durations, 1 / self.window.monitorFramePeriod, order, rng)
+
+    def flip(self, trial: int = -1, phase: str = None, condition=None) -> float:
+        """
+        Flips the window and records the flip time in frame_log. Use it instead of window.flip() in trial loops.
+
+        Parameters
+        ----------
+        trial : int
+            number of the running trial.
+
+        phase : str
+            running phase of the trial (e.g. fixation, stimulus, response).
+
+        condition
+            label of the running condition.
+
+        Returns
+        -------
+        float
+            flip time.
+        """
+        flip_time = self.window.flip()
+        self.frame_log.record(flip_time, trial, phase, condition)
+
+        return flip_time
+
+    def end_trial(self, max_dropped: int = None, **extra) -> dict:
+        """
+        Closes the timing record of the trial that was just shown. If it dropped more than `max_dropped` frames the
+        record is marked as corrupted so the trial can be repeated.
+
+        Returns
+        -------
+        dict
+            see FrameLog.end_trial().
+        """
+        record = self.frame_log.end_trial(max_dropped, **extra)
+
+        if record["dropped"]:
+            logging.warning(f"Trial {record['trial']} dropped {record['dropped']} frames "
+                            f"(longest interval {record['max_ms']:.1f} ms)")
+
+        return record
+
     def init_logging(self, clock):
         """
         Generates the log file to populate with messages throughout the experiment.
@@ -376,6 +498,12 @@ class BaseExperiment:
 
         self.window.saveFrameIntervals(self.data_paths["frames"])
 
+        if self._frame_log is not None:
+            self.frame_log.save(self.data_paths["frames"])
+
+        for name, sequence in self.sequences.items():
+            sequence.save(f"{self.data_paths['session']}_{name}_sequence")
+
     def end(self):
         """
         Closes the experiment
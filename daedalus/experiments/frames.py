@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Frame timing records kept while the experiment runs
+"""
+import csv
+import numpy as np
+
+
+class FrameLog:
+    """
+    Flip time of every frame, tagged with the trial, phase and condition it belonged to, in preallocated arrays.
+
+    record() is called after every flip and only writes a few array entries, so it doesn't add to the frame time.
+    Dropped frames (intervals longer than (1 + tolerance) frame periods) are counted as they come in, and stats()
+    gives the dropped count and interval percentiles over the last `window` frames whenever they're needed::
+
+        t = win.flip()
+        frames.record(t, trial=n, phase="stimulus", condition="12Hz")
+        ...
+        record = frames.end_trial(max_dropped=2)
+        if record["corrupted"]:
+            ...  # repeat the trial
+
+    Parameters
+    ----------
+    frame_period : float
+        expected seconds between flips (window.monitorFramePeriod).
+
+    capacity : int
+        number of frames room is made for. It's doubled if a session runs longer.
+
+    tolerance : float
+        fraction of a frame period an interval can be longer by before the frame counts as dropped.
+
+    window : int
+        number of recent frames stats() looks at.
+    """
+
+    def __init__(self, frame_period: float, capacity: int = 2 ** 16, tolerance: float = .5, window: int = 240) -> None:
+
+        self.frame_period = frame_period
+        self.tolerance = tolerance
+        self.window = window
+
+        self.flip_times = np.empty(capacity, dtype=np.float64)
+        self.trial = np.empty(capacity, dtype=np.int32)
+        self.phase = np.empty(capacity, dtype=np.int16)
+        self.condition = np.empty(capacity, dtype=np.int32)
+
+        # phase and condition labels are stored as codes
+        self.phases = {}
+        self.conditions = {}
+
+        self.dropped = 0
+        self.trials = []
+
+        self._n = 0
+        self._trial_start = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def record(self, flip_time: float, trial: int = -1, phase: str = None, condition=None) -> int:
+        """
+        Adds a flip.
+
+        Parameters
+        ----------
+        flip_time : float
+            time returned by window.flip().
+
+        trial : int
+            number of the running trial.
+
+        phase : str
+            e.g. "fixation" or "stimulus".
+
+        condition
+            label of the running condition.
+
+        Returns
+        -------
+        int
+            number of frames dropped right before this one.
+        """
+        if self._n == len(self.flip_times):
+            self._grow()
+
+        i = self._n
+        self.flip_times[i] = flip_time
+        self.trial[i] = trial
+        self.phase[i] = self.phases.setdefault(phase, len(self.phases))
+        self.condition[i] = self.conditions.setdefault(condition, len(self.conditions))
+        self._n += 1
+
+        # gaps between trials (breaks, instructions) aren't dropped frames
+        if not i or self.trial[i - 1] != trial:
+            return 0
+
+        interval = flip_time - self.flip_times[i - 1]
+        dropped = 0
+        if interval > (1 + self.tolerance) * self.frame_period:
+            dropped = int(round(interval / self.frame_period)) - 1
+            self.dropped += dropped
+
+        return dropped
+
+    def intervals(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """
+        Seconds between consecutive flips of frames [start, stop), leaving out the gaps between trials.
+        """
+        stop = self._n if stop is None else min(stop, self._n)
+        same_trial = np.diff(self.trial[start:stop]) == 0
+
+        return np.diff(self.flip_times[start:stop])[same_trial]
+
+    def dropped_frames(self, start: int = 0, stop: int = None) -> int:
+        """
+        Number of frames dropped among frames [start, stop).
+        """
+        intervals = self.intervals(start, stop)
+        late = intervals[intervals > (1 + self.tolerance) * self.frame_period]
+
+        return int(np.sum(np.round(late / self.frame_period) - 1))
+
+    def stats(self) -> dict:
+        """
+        Timing of the most recent `window` frames: dropped frames, 50th/95th/99th percentile and longest interval
+        in milliseconds, and all frames dropped so far.
+        """
+        start = max(self._n - self.window - 1, 0)
+        intervals = self.intervals(start) * 1000
+        if not len(intervals):
+            intervals = np.zeros(1)
+
+        p50, p95, p99 = np.percentile(intervals, [50, 95, 99])
+
+        return {
+            "dropped": self.dropped_frames(start),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(intervals.max()),
+            "total_dropped": self.dropped
+        }
+
+    def end_trial(self, max_dropped: int = None, **extra) -> dict:
+        """
+        Closes the frames recorded since the last call as one trial and keeps a timing record of it.
+
+        Parameters
+        ----------
+        max_dropped : int
+            more dropped frames than this mark the trial as corrupted.
+
+        extra
+            anything else to keep in the record.
+
+        Returns
+        -------
+        dict
+            trial number, condition, number of frames, duration, dropped frames, interval percentiles and longest
+            interval in milliseconds, dropped frames per phase and whether the trial is corrupted.
+        """
+        start, stop = self._trial_start, self._n
+        self._trial_start = stop
+
+        # the gap before the first frame is left out, there may have been a break without flips before it
+        frames = np.arange(start + 1, stop)
+        intervals = self.flip_times[frames] - self.flip_times[frames - 1]
+        late = intervals > (1 + self.tolerance) * self.frame_period
+        dropped = np.where(late, np.round(intervals / self.frame_period) - 1, 0)
+
+        phase_names = {code: name for name, code in self.phases.items()}
+        per_phase = np.bincount(self.phase[frames], weights=dropped, minlength=len(self.phases))
+        per_phase = {phase_names[code]: int(per_phase[code]) for code in np.unique(self.phase[start:stop])}
+
+        conditions = {code: name for name, code in self.conditions.items()}
+        intervals = intervals * 1000 if len(intervals) else np.zeros(1)
+        p50, p95, p99 = np.percentile(intervals, [50, 95, 99])
+
+        record = {
+            "trial": int(self.trial[start]) if stop > start else -1,
+            "condition": conditions[self.condition[start]] if stop > start else None,
+            "n_frames": stop - start,
+            "duration": float(self.flip_times[stop - 1] - self.flip_times[start]) if stop > start else 0.,
+            "dropped": int(dropped.sum()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(intervals.max()),
+            "dropped_per_phase": per_phase,
+            "corrupted": bool(max_dropped is not None and dropped.sum() > max_dropped)
+        }
+        record.update(extra)
+        self.trials.append(record)
+
+        return record
+
+    def save(self, path: str) -> dict:
+        """
+        Writes the frames to {path}.npz and the trial records to {path}_trials.csv.
+
+        Returns
+        -------
+        dict
+            paths of the "frames" and "trials" files.
+        """
+        paths = {"frames": path + ".npz", "trials": path + "_trials.csv"}
+
+        n = self._n
+        np.savez_compressed(
+            paths["frames"],
+            flip_times=self.flip_times[:n],
+            trial=self.trial[:n],
+            phase=self.phase[:n],
+            condition=self.condition[:n],
+            phases=np.array([str(name) for name in self.phases]),
+            conditions=np.array([str(name) for name in self.conditions]),
+            frame_period=self.frame_period
+        )
+
+        if self.trials:
+            fields = list(dict.fromkeys(key for record in self.trials for key in record))
+            with open(paths["trials"], "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(self.trials)
+
+        return paths
+
+    def _grow(self) -> None:
+        for name in ("flip_times", "trial", "phase", "condition"):
+            old = getattr(self, name)
+            new = np.empty(2 * len(old), dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
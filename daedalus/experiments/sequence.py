@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Whole-session trial sequences generated before the session starts
+"""
+import json
+import numpy as np
+from daedalus.experiments.timeline import Timeline
+from daedalus.utils.misc import jittered
+
+
+class SessionSequence:
+    """
+    Every trial of a session worked out in advance from one seeded np.random.Generator: the condition order, the
+    jittered number of frames of every phase and where the blocks (and rests) are.
+
+    The trials are rows of a structured array so the run loop reads trial i with one index, and the array is saved
+    with the seed and settings next to the data so the session can be reproduced exactly::
+
+        seq = SessionSequence(conditions, n_reps=20, durations=settings["EXPERIMENT"]["durations"],
+                              refresh_rate=240, block_size=60, seed=1234)
+        for trial in seq.trials:
+            timeline = seq.timeline(trial["trial"])
+            condition = seq.conditions[trial["condition"]]
+            ...
+            if trial["rest_after"]:
+                ...
+
+    Fields of `trials`: trial, block, rep, condition (index into `conditions`), frames_{phase} for every phase (at
+    least 1), total_frames and rest_after.
+
+    Parameters
+    ----------
+    conditions : list
+        conditions (e.g. dicts from psychopy.data.importConditions()).
+
+    n_reps : int
+        repetitions of every condition.
+
+    durations : dict
+        {phase: [milliseconds, jitter in milliseconds]} as in the experiment settings, in the order they're shown.
+
+    refresh_rate : float
+        monitor's refresh rate.
+
+    block_size : int
+        trials per block, one block by default.
+
+    method : str
+        "random" shuffles the conditions within every repetition (like psychopy's TrialHandler), "fullRandom"
+        shuffles all trials, "sequential" keeps the order.
+
+    seed : int
+        seed of the generator. A new one is drawn (and kept in `seed`) if not given.
+    """
+
+    def __init__(self, conditions: list, n_reps: int, durations: dict, refresh_rate: float, block_size: int = None,
+                 method: str = "random", seed: int = None) -> None:
+
+        if method not in ("random", "fullRandom", "sequential"):
+            raise ValueError(f"Unknown method {method}, use 'random', 'fullRandom' or 'sequential'.")
+
+        self.conditions = list(conditions)
+        self.n_reps = int(n_reps)
+        self.durations = {name: list(np.atleast_1d(val)) for name, val in durations.items()}
+        self.refresh_rate = refresh_rate
+        self.method = method
+        self.seed = int(np.random.SeedSequence().entropy % 2 ** 63) if seed is None else int(seed)
+        self.phases = list(durations)
+
+        n_conds = len(self.conditions)
+        n_trials = n_conds * self.n_reps
+        self.block_size = int(block_size) if block_size else max(n_trials, 1)
+        rng = np.random.default_rng(self.seed)
+
+        order = np.tile(np.arange(n_conds), (self.n_reps, 1))
+        if method == "random":
+            order = rng.permuted(order, axis=1)
+        order = order.ravel()
+        if method == "fullRandom":
+            order = rng.permutation(order)
+
+        # jitter of every phase of all trials at once
+        values = np.array([self.durations[name] + [0] * (2 - len(self.durations[name])) for name in self.phases],
+                          dtype=np.float64).reshape(len(self.phases), 2)
+        ms = jittered(values[:, 0], values[:, 1], size=(n_trials, len(self.phases)), rng=rng)
+        frames = np.maximum(np.round(ms / 1000 * refresh_rate), 1).astype(np.int32)
+
+        fields = [("trial", np.int32), ("block", np.int16), ("rep", np.int16), ("condition", np.int16)]
+        fields += [(f"frames_{name}", np.int32) for name in self.phases]
+        fields += [("total_frames", np.int32), ("rest_after", np.bool_)]
+
+        trials = np.zeros(n_trials, dtype=fields)
+        trials["trial"] = np.arange(n_trials)
+        trials["block"] = trials["trial"] // self.block_size
+        trials["rep"] = trials["trial"] // max(n_conds, 1)
+        trials["condition"] = order
+        for i, name in enumerate(self.phases):
+            trials[f"frames_{name}"] = frames[:, i]
+        trials["total_frames"] = frames.sum(axis=1)
+        trials["rest_after"] = np.diff(trials["block"], append=trials["block"][-1:]) > 0
+
+        self.trials = trials
+        self.trials.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.trials)
+
+    def __getitem__(self, trial: int):
+        return self.trials[trial]
+
+    @property
+    def n_blocks(self) -> int:
+        return int(self.trials["block"][-1]) + 1 if len(self.trials) else 0
+
+    def condition(self, trial: int):
+        """
+        Condition shown on a trial.
+        """
+        return self.conditions[self.trials["condition"][trial]]
+
+    def timeline(self, trial: int) -> Timeline:
+        """
+        Frames of a trial's phases, ready for TimelineRunner.
+        """
+        row = self.trials[trial]
+        return Timeline((name, row[f"frames_{name}"]) for name in self.phases)
+
+    def save(self, path: str) -> str:
+        """
+        Writes the trials and everything needed to make them again to {path}.npz.
+
+        Returns
+        -------
+        str
+            path of the file.
+        """
+        path = path if path.endswith(".npz") else path + ".npz"
+        settings = {
+            "conditions": self.conditions,
+            "n_reps": self.n_reps,
+            "durations": self.durations,
+            "refresh_rate": self.refresh_rate,
+            "block_size": self.block_size,
+            "method": self.method,
+            "seed": self.seed
+        }
+        np.savez(path, trials=self.trials, settings=json.dumps(settings, default=_plain))
+
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "SessionSequence":
+        """
+        Reads a sequence written by save(). It's generated again from the saved seed and checked against the saved
+        trials.
+        """
+        with np.load(path) as f:
+            trials = f["trials"]
+            settings = json.loads(str(f["settings"]))
+
+        seq = cls(**settings)
+        if not np.array_equal(seq.trials, trials):
+            raise ValueError(f"{path} doesn't match the sequence its seed and settings make.")
+
+        return seq
+
+
+def _plain(value):
+    """
+    Numpy values in conditions as python ones, for JSON.
+    """
+    return value.item() if isinstance(value, np.generic) else str(value)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Trial timelines compiled to frames ahead of time and the draw/flip loop that plays them
+"""
+import numpy as np
+from daedalus.utils.misc import jittered
+
+
+class Timeline:
+    """
+    Phases of a trial as whole frames: which phase every frame belongs to and its frame number inside the phase,
+    computed before the trial so the frame loop only indexes lists.
+
+    Parameters
+    ----------
+    phases : list
+        (name, number of frames) of every phase in the order they're shown.
+    """
+
+    def __init__(self, phases) -> None:
+
+        phases = list(phases)
+        self.names = [name for name, _ in phases]
+        self.lengths = np.array([int(n) for _, n in phases], dtype=np.int64)
+        self.starts = np.concatenate([[0], np.cumsum(self.lengths)[:-1]]).astype(np.int64)
+        self.n_frames = int(self.lengths.sum())
+
+        codes = np.repeat(np.arange(len(self.names)), self.lengths)
+        local = np.arange(self.n_frames) - np.repeat(self.starts, self.lengths)
+
+        # plain lists: indexing them in the frame loop gives python ints without creating numpy scalars
+        self.phase = codes.tolist()
+        self.local_frame = local.tolist()
+
+    @classmethod
+    def from_durations(cls, durations: dict, refresh_rate: float, order: list = None, rng=None) -> "Timeline":
+        """
+        Compiles the `durations` of the experiment settings ({phase: [milliseconds, jitter in milliseconds]}).
+
+        Jitter is drawn with misc.jittered (one of 10 evenly spaced values between -jitter and +jitter) for every
+        phase at once. Every phase lasts at least one frame.
+
+        Parameters
+        ----------
+        durations : dict
+            phase durations from the settings.
+
+        refresh_rate : float
+            monitor's refresh rate.
+
+        order : list
+            phase names in the order they're shown, the order of `durations` by default.
+
+        rng : numpy.random.Generator
+            source of the jitter, for reproducible timelines.
+
+        Returns
+        -------
+        Timeline
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        order = list(order) if order is not None else list(durations)
+
+        values = np.array([durations[name] for name in order], dtype=np.float64).reshape(len(order), -1)
+        lag = values[:, 1] if values.shape[1] > 1 else np.zeros(len(order))
+        seconds = jittered(values[:, 0], lag, size=len(order), rng=rng) / 1000
+
+        # a phase never rounds away: its onset marker would be lost from the recording
+        return cls(zip(order, np.maximum(np.round(seconds * refresh_rate), 1).astype(int)))
+
+    def __len__(self) -> int:
+        return self.n_frames
+
+    def duration(self, refresh_rate: float) -> float:
+        return self.n_frames / refresh_rate
+
+    def onsets(self) -> dict:
+        """
+        First frame of every phase.
+        """
+        return dict(zip(self.names, self.starts.tolist()))
+
+
+class TimelineRunner:
+    """
+    Plays a Timeline: calls the draw function of the running phase, flips, and in between checks the keyboard and
+    sends markers without ever waiting on anything but the flip.
+
+    Everything the loop needs is looked up from lists made before the first frame. Markers are sent with
+    window.callOnFlip so they go out at the flip the phase becomes visible::
+
+        runner = TimelineRunner(win, {"fixation": draw_fixation, "stimulus": flicker.draw}, keyboard=kb,
+                                respond=["stimulus", "response"], outlet=outlet,
+                                markers={"stimulus": 1}, frame_log=exp.frame_log)
+        result = runner.run(Timeline.from_durations(durations, 240), trial=n, condition="12Hz")
+
+    Parameters
+    ----------
+    window : psychopy.visual.Window
+        window to flip.
+
+    draws : dict
+        function per phase name called with the frame number inside the phase (e.g. FlickerArray.draw), or a list
+        of stimuli whose draw() is called. Phases without one show a blank screen.
+
+    keyboard : psychopy.hardware.keyboard.Keyboard
+        keyboard polled (without waiting) during the `respond` phases.
+
+    respond : list
+        phases in which key presses are collected.
+
+    keys : list
+        keys that count as responses, any key by default.
+
+    end_on_response : bool
+        end the trial at the first response instead of finishing the timeline.
+
+    outlet : pylsl.StreamOutlet
+        marker stream.
+
+    markers : dict
+        marker sent at the onset of a phase, by phase name.
+
+    frame_log : daedalus.experiments.frames.FrameLog
+        where flip times are recorded.
+    """
+
+    def __init__(self, window, draws: dict, keyboard=None, respond=(), keys=None, end_on_response: bool = False,
+                 outlet=None, markers: dict = None, frame_log=None) -> None:
+
+        self.window = window
+        self.draws = {name: self._as_draw(draw) for name, draw in draws.items()}
+        self.keyboard = keyboard
+        self.respond = set(respond)
+        self.keys = keys
+        self.end_on_response = end_on_response
+        self.outlet = outlet
+        self.markers = markers or {}
+        self.frame_log = frame_log
+
+    def run(self, timeline: Timeline, trial: int = -1, condition=None) -> dict:
+        """
+        Shows one trial.
+
+        Returns
+        -------
+        dict
+            "keys": (name, rt) of every response with the rt from the onset of the first response phase, "onsets":
+            flip time of the first frame of every phase, "frames": number of frames shown.
+        """
+        names = timeline.names
+        draws = [self.draws.get(name, _blank) for name in names]
+        polls = [self.keyboard is not None and name in self.respond for name in names]
+        onset_markers = [self.markers.get(name) for name in names]
+        phases, local_frames = timeline.phase, timeline.local_frame
+
+        window, outlet, frame_log = self.window, self.outlet, self.frame_log
+        responses, onsets = [], {}
+        response_start = None
+        frame = 0
+
+        for frame in range(timeline.n_frames):
+            code = phases[frame]
+            local = local_frames[frame]
+
+            draws[code](local)
+
+            if not local:
+                if outlet is not None and onset_markers[code] is not None:
+                    window.callOnFlip(outlet.push_sample, [onset_markers[code]])
+                if polls[code] and response_start is None:
+                    # presses made before the response phase aren't responses
+                    window.callOnFlip(self.keyboard.clearEvents)
+                    window.callOnFlip(self.keyboard.clock.reset)
+
+            flip_time = window.flip()
+
+            if frame_log is not None:
+                frame_log.record(flip_time, trial, names[code], condition)
+            if not local:
+                onsets[names[code]] = flip_time
+                if polls[code] and response_start is None:
+                    response_start = flip_time
+
+            if polls[code]:
+                pressed = self.keyboard.getKeys(keyList=self.keys, waitRelease=False)
+                if pressed:
+                    responses.extend((key.name, key.rt) for key in pressed)
+                    if self.end_on_response:
+                        break
+
+        return {"keys": responses, "onsets": onsets, "frames": frame + 1 if timeline.n_frames else 0}
+
+    @staticmethod
+    def _as_draw(draw):
+        """
+        Phase draw functions take the frame number inside the phase; lists of stimuli are wrapped into one.
+        """
+        if callable(draw):
+            return draw
+
+        stims = list(draw)
+
+        def draw_all(_):
+            for stim in stims:
+                stim.draw()
+
+        return draw_all
+
+
+def _blank(_):
+    pass
@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Background acquisition of LSL streams so recording can run next to the experiment's frame loop
+"""
+import abc
+import collections
+import threading
+import numpy as np
+from daedalus.ssvep.buffers import EEGBuffer
+from daedalus.ssvep.clock import ClockSync, Dejitter
+from daedalus.ssvep.lsl_stream import lsl_dtype
+
+
+class PullThread(threading.Thread, metaclass=abc.ABCMeta):
+    """
+    Thread that keeps pulling from an LSL inlet until it's stopped. Subclasses implement pull().
+
+    An exception in the pull (e.g. pylsl.LostError when the outlet goes away) ends the thread, but it isn't lost:
+    it's kept in `error`, `stopped` turns True and check() (and so the recorders' stop() and latest()) raises it
+    on the consumer's thread.
+    """
+
+    def __init__(self, name: str) -> None:
+
+        super().__init__(name=name, daemon=True)
+
+        self.error = None
+        self._running = threading.Event()
+        self._stopped = threading.Event()
+
+    @property
+    def stopped(self) -> bool:
+        """
+        Whether the thread has stopped pulling, because it was asked to or because the pull failed.
+        """
+        return self._stopped.is_set()
+
+    def start(self) -> None:
+
+        # set before the thread runs so a stop() right after start() isn't undone
+        self._running.set()
+        super().start()
+
+    def run(self) -> None:
+
+        try:
+            while self._running.is_set():
+                self.pull()
+        except Exception as err:
+            self.error = err
+        finally:
+            self._running.clear()
+            self._stopped.set()
+
+    @abc.abstractmethod
+    def pull(self) -> None:
+        """
+        One pull from the inlet.
+        """
+
+    def stop(self) -> None:
+        """
+        Asks the thread to finish after the current pull.
+        """
+        self._running.clear()
+
+    def check(self) -> None:
+        """
+        Raises the exception that ended the thread, if one did.
+        """
+        if self.error is not None:
+            raise self.error
+
+
+class AcquisitionThread(PullThread):
+    """
+    Pulls chunks of a numeric LSL stream into an EEGBuffer on its own thread.
+
+    pylsl releases the GIL while it waits in pull_chunk, so the thread doesn't hold up the caller. The buffer is
+    only touched under `lock`; readers should take it too (StreamRecorder does that for you).
+
+    Parameters
+    ----------
+    inlet : pylsl.StreamInlet
+        stream to read.
+
+    chunk_size : int
+        maximum number of samples pulled at once.
+
+    timeout : float
+        seconds to wait for a chunk before checking whether the thread was stopped.
+
+    buffer : EEGBuffer
+        buffer to write into. A new one matching the stream is made if not given.
+
+    lock : threading.Lock
+        lock guarding the buffer, for sharing it with readers. A new one is made if not given.
+
+    sync_interval : float
+        seconds between two time_correction() calls. Timestamps are moved to the local clock (and dejittered for
+        regularly sampled streams) before they're committed. None keeps the stream's own timestamps.
+    """
+
+    def __init__(self, inlet, chunk_size: int, timeout: float = 0.2, buffer: EEGBuffer = None,
+                 lock: threading.Lock = None, sync_interval: float = 5.) -> None:
+
+        info = inlet.info()
+        super().__init__(f"{info.name()}Acquisition")
+
+        self.inlet = inlet
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        dtype = lsl_dtype(info)
+        if buffer is None:
+            buffer = EEGBuffer(info.channel_count(), chunk_size, dtype=dtype)
+        elif buffer.dtype != dtype:
+            raise ValueError(f"{info.name()} sends {np.dtype(dtype)} samples but the buffer holds {buffer.dtype}.")
+        self.buffer = buffer
+        self.lock = lock if lock is not None else threading.Lock()
+
+        self.clock = None
+        self.dejitter = None
+        if sync_interval is not None:
+            self.clock = ClockSync(inlet, interval=sync_interval)
+            if info.nominal_srate() > 0:
+                self.dejitter = Dejitter(info.nominal_srate())
+
+    def pull(self) -> None:
+
+        with self.lock:
+            block = self.buffer.reserve()
+
+        # the reserved rows aren't visible to readers until they're committed
+        _, stamps = self.inlet.pull_chunk(timeout=self.timeout, max_samples=self.chunk_size, dest_obj=block)
+
+        if stamps:
+            if self.dejitter is not None:
+                stamps = self.dejitter.process(stamps)
+            if self.clock is not None:
+                self.clock.update()
+                stamps = self.clock.correct(stamps)
+
+            with self.lock:
+                self.buffer.commit(stamps)
+
+
+class MarkerThread(PullThread):
+    """
+    Collects samples of a Markers stream on its own thread.
+
+    Parameters
+    ----------
+    inlet : pylsl.StreamInlet
+        Markers stream.
+
+    timeout : float
+        seconds to wait for a marker before checking whether the thread was stopped.
+
+    markers : collections.deque
+        where (marker, timestamp) pairs are appended. A new one is made if not given.
+
+    sync_interval : float
+        seconds between two time_correction() calls, None keeps the stream's own timestamps.
+    """
+
+    def __init__(self, inlet, timeout: float = 0.2, markers: collections.deque = None,
+                 sync_interval: float = 5.) -> None:
+
+        super().__init__(f"{inlet.info().name()}Acquisition")
+
+        self.inlet = inlet
+        self.timeout = timeout
+        self.markers = markers if markers is not None else collections.deque()
+        self.clock = ClockSync(inlet, interval=sync_interval) if sync_interval is not None else None
+
+    def pull(self) -> None:
+
+        samples, stamps = self.inlet.pull_chunk(timeout=self.timeout)
+
+        if stamps and self.clock is not None:
+            self.clock.update()
+            stamps = self.clock.correct(stamps)
+
+        # deque appends are thread-safe so readers don't need a lock
+        self.markers.extend((sample[0], stamp) for sample, stamp in zip(samples, stamps))
+
+
+class StreamRecorder:
+    """
+    Records one EEG stream and an optional Markers stream in the background.
+
+    The calling thread only pays for `latest()` and `snapshot()`, which hand out views of the buffer instead of
+    copying the recording, so a PsychoPy frame loop never waits on pull_chunk. If a stream is lost the thread
+    reading it stops, and latest() and stop() raise its exception; what was recorded until then stays in the buffer,
+    so take the snapshot() even when stop() raises::
+
+        recorder = StreamRecorder(get_streams(["obci_eeg1", "Markers"], chunk_size), chunk_size)
+        recorder.start()
+        ...
+        window, stamps = recorder.latest(500)
+        ...
+        try:
+            recorder.stop()
+        finally:
+            recording = recorder.snapshot()
+
+    Parameters
+    ----------
+    inlets : dict
+        LSL inlets as returned by get_streams(): one EEG and at most one Markers stream.
+
+    chunk_size : int
+        maximum number of EEG samples pulled at once.
+
+    timeout : float
+        seconds each thread waits on its inlet before checking whether it was stopped.
+
+    sync_interval : float
+        seconds between two time_correction() calls on each inlet. None keeps the streams' own timestamps.
+    """
+
+    def __init__(self, inlets: dict, chunk_size: int, timeout: float = 0.2, sync_interval: float = 5.) -> None:
+
+        eeg_inlets = [inlet for inlet in inlets.values() if inlet.info().type() == "EEG"]
+        marker_inlets = [inlet for inlet in inlets.values() if inlet.info().type() == "Markers"]
+
+        if len(eeg_inlets) != 1:
+            raise RuntimeError("Exactly one EEG stream is accepted but {} provided.".format(len(eeg_inlets)))
+
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.sync_interval = sync_interval
+
+        self._eeg_inlet = eeg_inlets[0]
+        self._marker_inlet = marker_inlets[0] if marker_inlets else None
+        self._eeg_thread = None
+        self._marker_thread = None
+
+        info = self._eeg_inlet.info()
+        self.buffer = EEGBuffer(info.channel_count(), chunk_size, dtype=lsl_dtype(info))
+        self.markers = collections.deque()
+
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._eeg_thread is not None and self._eeg_thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Starts the acquisition threads. Calling it again after stop() keeps appending to the same buffer.
+        """
+        if self.running:
+            return
+
+        # threads can't be restarted so every start() gets new ones that share the buffers
+        self._eeg_thread = AcquisitionThread(self._eeg_inlet, self.chunk_size, self.timeout, buffer=self.buffer,
+                                             lock=self._lock, sync_interval=self.sync_interval)
+        self._eeg_thread.start()
+
+        if self._marker_inlet is not None:
+            self._marker_thread = MarkerThread(self._marker_inlet, self.timeout, markers=self.markers,
+                                               sync_interval=self.sync_interval)
+            self._marker_thread.start()
+
+    @property
+    def failed(self) -> bool:
+        """
+        Whether a thread stopped because its pull raised.
+        """
+        return any(thread is not None and thread.error is not None
+                   for thread in (self._eeg_thread, self._marker_thread))
+
+    def check(self) -> None:
+        """
+        Raises the exception that stopped an acquisition thread, if one did.
+        """
+        for thread in (self._eeg_thread, self._marker_thread):
+            if thread is not None:
+                thread.check()
+
+    def stop(self) -> None:
+        """
+        Stops the acquisition threads and waits for them to finish their last pull. Raises the exception that
+        stopped a thread early, if one did, after the threads have finished: the recording is still in the buffer
+        and snapshot() returns it, so callers that save the data should do that whether or not stop() raises.
+        """
+        for thread in (self._eeg_thread, self._marker_thread):
+            if thread is not None:
+                thread.stop()
+        for thread in (self._eeg_thread, self._marker_thread):
+            if thread is not None:
+                thread.join()
+
+        self.check()
+
+    def latest(self, n_samples: int) -> tuple:
+        """
+        Most recent EEG samples, e.g. a sliding window for online decoding.
+
+        Parameters
+        ----------
+        n_samples : int
+
+        Returns
+        -------
+        tuple
+            (n_channels, n) data and (n,) timestamps. These are views unless the window spans two buffer segments.
+        """
+        # a lost stream shouldn't look like one that's just quiet
+        self.check()
+
+        with self._lock:
+            return self.buffer.latest(n_samples)
+
+    def snapshot(self) -> dict:
+        """
+        Everything recorded so far, without copying the EEG.
+
+        Returns
+        -------
+        dict
+            "eeg": list of (data, timestamps) views per buffer segment, "markers": list of (marker, timestamp).
+        """
+        with self._lock:
+            segments = self.buffer.segments()
+
+        return {
+            "eeg": segments,
+            "markers": list(self.markers)
+        }
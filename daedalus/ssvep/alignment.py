@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Maps marker timestamps onto EEG samples after the recording
+"""
+import warnings
+import numpy as np
+
+
+def align_markers(eeg_ts, marker_ts, markers, eeg_offset=0., marker_offset=0., event_id: dict = None) -> tuple:
+    """
+    Finds the EEG sample closest in time to every marker and builds an MNE events array from them.
+
+    Both clocks are moved to the local clock with their time_correction() offsets first. The lookup is a single
+    np.searchsorted over all markers, so it also works when samples are missing between chunks. Markers from before
+    the first or after the last sample have no sample of their own and are left out with a warning.
+
+    Markers can be anything an LSL marker stream sends. Numbers (and strings of integers) are their own event ids,
+    other labels get new ids (see marker_codes()), and the mapping is returned with the events as MNE's `event_id`.
+
+    Parameters
+    ----------
+    eeg_ts : numpy.ndarray
+        timestamp of every EEG sample, in recording order.
+
+    marker_ts : numpy.ndarray
+        timestamp of every marker.
+
+    markers : list or numpy.ndarray
+        marker values.
+
+    eeg_offset : float or numpy.ndarray
+        time correction of the EEG stream, one value or one per sample.
+
+    marker_offset : float or numpy.ndarray
+        time correction of the Markers stream, one value or one per marker.
+
+    event_id : dict
+        maps marker labels to integer event ids. Labels missing from it get new ids after the largest one.
+
+    Returns
+    -------
+    tuple
+        (n_events, 3) events array of [sample, 0, event id] and the {label: event id} mapping.
+    """
+    eeg_ts = np.asarray(eeg_ts, dtype=np.float64) + eeg_offset
+    marker_ts = np.asarray(marker_ts, dtype=np.float64) + marker_offset
+
+    labels, event_id = marker_codes(markers, event_id)
+
+    if len(eeg_ts):
+        inside = (marker_ts >= eeg_ts[0]) & (marker_ts <= eeg_ts[-1])
+    else:
+        inside = np.zeros(len(marker_ts), dtype=bool)
+    if not inside.all():
+        warnings.warn("{} of {} markers are outside the recorded samples and were dropped."
+                      .format(int((~inside).sum()), len(marker_ts)))
+        marker_ts = marker_ts[inside]
+        labels = [label for label, keep in zip(labels, inside) if keep]
+
+    events = np.zeros((len(marker_ts), 3), dtype=int)
+    if not len(marker_ts):
+        return events, event_id
+
+    # first sample at or after each marker, then step back where the previous sample is closer
+    after = np.clip(np.searchsorted(eeg_ts, marker_ts), 1, len(eeg_ts) - 1)
+    before = after - 1
+    closer = np.abs(marker_ts - eeg_ts[before]) <= np.abs(eeg_ts[after] - marker_ts)
+    samples = np.where(closer, before, after)
+
+    if len(eeg_ts) == 1:
+        samples[:] = 0
+
+    events[:, 0] = samples
+    events[:, 2] = [event_id[label] for label in labels]
+
+    return events, event_id
+
+
+def marker_codes(markers, event_id: dict = None) -> tuple:
+    """
+    Labels of the markers and the integer event id of every label.
+
+    Numeric markers (and strings of integers) keep their value as id. Any other label gets the next free id, in
+    sorted order so the same labels always get the same ids. Labels are strings, as in MNE's `event_id`.
+
+    Parameters
+    ----------
+    markers : list or numpy.ndarray
+        marker values.
+
+    event_id : dict
+        ids that are already known, it isn't changed.
+
+    Returns
+    -------
+    tuple
+        label of every marker and the {label: event id} mapping of all of them.
+    """
+    values = np.asarray(markers)
+    event_id = {str(label): int(code) for label, code in (event_id or {}).items()}
+
+    if values.dtype.kind in "biuf":
+        codes = values.astype(int)
+        labels = [str(code) for code in codes.tolist()]
+        new = dict(zip(labels, codes.tolist()))
+    else:
+        labels = [str(marker) for marker in markers]
+        new = {}
+        for label in sorted(set(labels).difference(event_id)):
+            try:
+                new[label] = int(label)
+            except ValueError:
+                continue
+
+    for label, code in new.items():
+        event_id.setdefault(label, code)
+
+    # labels that aren't numbers take ids after every id in use
+    next_code = max(event_id.values(), default=0) + 1
+    for label in sorted(set(labels).difference(event_id)):
+        event_id[label] = next_code
+        next_code += 1
+
+    return labels, event_id
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Preallocated sample buffers that LSL inlets write into directly
+"""
+import numpy as np
+
+
+class EEGBuffer:
+    """
+    Growable buffer for multichannel samples coming in chunk by chunk.
+
+    Samples are stored sample-major (n_samples, n_channels) in fixed-size segments. A segment is allocated once and
+    never moved or resized, so `pylsl.StreamInlet.pull_chunk` can write into it directly through `dest_obj` and any
+    view handed out to a reader stays valid while the recording goes on. The final (n_channels, n_samples) array is
+    assembled in one pass at the end.
+
+    Parameters
+    ----------
+    n_chans : int
+        Number of channels in each sample.
+
+    chunk_size : int
+        Largest number of samples written at once. Every segment keeps room for at least one full chunk.
+
+    segment_len : int
+        Number of samples per segment (default 2**16, about 4 minutes of 250 Hz data).
+
+    dtype : numpy.dtype
+        Sample type. Has to match the channel format of the stream when writing through `reserve()`.
+    """
+
+    def __init__(self, n_chans: int, chunk_size: int, segment_len: int = 2 ** 16, dtype=np.float32) -> None:
+
+        if segment_len < chunk_size:
+            raise ValueError(f"Segment length ({segment_len}) has to be at least one chunk ({chunk_size}).")
+
+        self.n_chans = n_chans
+        self.chunk_size = chunk_size
+        self.segment_len = segment_len
+        self.dtype = np.dtype(dtype)
+
+        self._segments = []
+        self._stamps = []
+        self._fill = []
+        self._n_samples = 0
+
+        self._new_segment()
+
+    def __len__(self) -> int:
+        return self._n_samples
+
+    @property
+    def shape(self) -> tuple:
+        """
+        Shape of the assembled data, (n_channels, n_samples).
+        """
+        return self.n_chans, self._n_samples
+
+    def reserve(self) -> np.ndarray:
+        """
+        Writable block right after the last committed sample, big enough for one full chunk.
+        Nothing counts as recorded until `commit()` is called.
+
+        Returns
+        -------
+        numpy.ndarray
+            C-contiguous (chunk_size, n_channels) view into the current segment.
+        """
+        if self.segment_len - self._fill[-1] < self.chunk_size:
+            self._new_segment()
+
+        pos = self._fill[-1]
+
+        return self._segments[-1][pos:pos + self.chunk_size]
+
+    def commit(self, timestamps) -> None:
+        """
+        Marks the first len(timestamps) rows of the last reserved block as recorded.
+
+        Parameters
+        ----------
+        timestamps : list or numpy.ndarray
+            one timestamp per sample that was written into the block.
+        """
+        n_new = len(timestamps)
+        pos = self._fill[-1]
+
+        if pos + n_new > self.segment_len:
+            raise ValueError(f"Can't commit {n_new} samples, only {self.segment_len - pos} were reserved.")
+
+        self._stamps[-1][pos:pos + n_new] = timestamps
+        self._fill[-1] = pos + n_new
+        self._n_samples += n_new
+
+    def append(self, samples, timestamps) -> None:
+        """
+        Copies samples that are already in memory into the buffer.
+
+        Parameters
+        ----------
+        samples : list or numpy.ndarray
+            (n_samples, n_channels) sample-major data, e.g. what pull_chunk returns without dest_obj.
+
+        timestamps : list or numpy.ndarray
+            one timestamp per sample.
+        """
+        samples = np.asarray(samples, dtype=self.dtype).reshape(-1, self.n_chans)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+
+        start = 0
+        while start < len(samples):
+            pos = self._fill[-1]
+            if pos == self.segment_len:
+                self._new_segment()
+                pos = 0
+
+            stop = start + min(self.segment_len - pos, len(samples) - start)
+            n_new = stop - start
+
+            self._segments[-1][pos:pos + n_new] = samples[start:stop]
+            self._stamps[-1][pos:pos + n_new] = timestamps[start:stop]
+            self._fill[-1] = pos + n_new
+            self._n_samples += n_new
+
+            start = stop
+
+    def to_array(self) -> np.ndarray:
+        """
+        Assembles the recorded samples in MNE's (n_channels, n_samples) layout.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        data = np.empty((self.n_chans, self._n_samples), dtype=self.dtype)
+
+        start = 0
+        for seg, fill in zip(self._segments, self._fill):
+            data[:, start:start + fill] = seg[:fill].T
+            start += fill
+
+        return data
+
+    def latest(self, n_samples: int) -> tuple:
+        """
+        Most recent samples. When they all sit in the last segment (the usual case for decoding windows) the result
+        is a view and nothing is copied.
+
+        Parameters
+        ----------
+        n_samples : int
+            how many samples to return. Fewer are returned if fewer were recorded.
+
+        Returns
+        -------
+        tuple
+            (n_channels, n) data and (n,) timestamps.
+        """
+        n_samples = min(n_samples, self._n_samples)
+        fill = self._fill[-1]
+
+        if n_samples <= fill:
+            return self._segments[-1][fill - n_samples:fill].T, self._stamps[-1][fill - n_samples:fill]
+
+        # the window spans a segment boundary, only the window itself gets copied
+        data = np.empty((self.n_chans, n_samples), dtype=self.dtype)
+        stamps = np.empty(n_samples, dtype=np.float64)
+        stop = n_samples
+        for seg, ts, fill in zip(reversed(self._segments), reversed(self._stamps), reversed(self._fill)):
+            take = min(fill, stop)
+            data[:, stop - take:stop] = seg[fill - take:fill].T
+            stamps[stop - take:stop] = ts[fill - take:fill]
+            stop -= take
+            if stop == 0:
+                break
+
+        return data, stamps
+
+    def segments(self) -> list:
+        """
+        Views of the recorded part of every segment. Recorded rows are never written again, so the views can be read
+        while more data comes in.
+
+        Returns
+        -------
+        list
+            (data, timestamps) tuples with (n_channels, n) data, in recording order.
+        """
+        return [(seg[:fill].T, ts[:fill]) for seg, ts, fill in zip(self._segments, self._stamps, self._fill)]
+
+    def timestamps(self) -> np.ndarray:
+        """
+        Timestamps of all recorded samples.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        return np.concatenate([ts[:fill] for ts, fill in zip(self._stamps, self._fill)])
+
+    def _new_segment(self) -> None:
+        """
+        Allocates the next segment.
+        """
+        self._segments.append(np.empty((self.segment_len, self.n_chans), dtype=self.dtype))
+        self._stamps.append(np.empty(self.segment_len, dtype=np.float64))
+        self._fill.append(0)
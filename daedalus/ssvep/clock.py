@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Clock drift and timestamp jitter correction for LSL streams
+"""
+import collections
+import numpy as np
+from pylsl import local_clock
+
+
+class ClockSync:
+    """
+    Running linear model of a stream's clock offset, fitted to time_correction() samples.
+
+    time_correction() is a network round trip, so instead of calling it for every chunk it's sampled every
+    `interval` seconds and a line is fitted to the last `n_points` offsets against the stream's clock. The fit
+    then corrects whole arrays of timestamps at once and also follows slow drift between the two clocks.
+
+    Parameters
+    ----------
+    inlet : pylsl.StreamInlet
+        stream whose timestamps need to be moved to the local clock.
+
+    interval : float
+        seconds between two time_correction() calls.
+
+    n_points : int
+        number of recent offsets the line is fitted to.
+
+    timeout : float
+        timeout of each time_correction() call.
+    """
+
+    def __init__(self, inlet, interval: float = 5., n_points: int = 30, timeout: float = 2.) -> None:
+
+        self.inlet = inlet
+        self.interval = interval
+        self.timeout = timeout
+
+        self._points = collections.deque(maxlen=n_points)
+        self._last = -np.inf
+        self._origin = 0.
+        self._slope = 0.
+        self._intercept = 0.
+
+        self.update()
+
+    @property
+    def offset(self) -> float:
+        """
+        Latest measured offset of the stream's clock to the local one, in seconds.
+        """
+        return self._points[-1][1] if self._points else 0.
+
+    def update(self, now: float = None) -> bool:
+        """
+        Samples time_correction() and refits the model if `interval` has passed since the last sample. Cheap to call
+        on every loop iteration.
+
+        Parameters
+        ----------
+        now : float
+            current local_clock() time if the caller already has it.
+
+        Returns
+        -------
+        bool
+            True if a new offset was sampled.
+        """
+        if now is None:
+            now = local_clock()
+        if now - self._last < self.interval:
+            return False
+
+        offset = self.inlet.time_correction(timeout=self.timeout)
+        self._last = now
+
+        # offsets are modelled against the stream's own clock since that's what the timestamps are in
+        self._points.append((now - offset, offset))
+        if len(self._points) == 1:
+            self._origin = now - offset
+
+        x, y = np.array(self._points).T
+        if len(self._points) > 1:
+            self._slope, self._intercept = np.polyfit(x - self._origin, y, 1)
+        else:
+            self._slope, self._intercept = 0., offset
+
+        return True
+
+    def correct(self, timestamps) -> np.ndarray:
+        """
+        Moves timestamps from the stream's clock to the local clock.
+
+        Parameters
+        ----------
+        timestamps : list or numpy.ndarray
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+
+        return timestamps + self._intercept + self._slope * (timestamps - self._origin)
+
+
+class Dejitter:
+    """
+    Smooths the timestamps of a regularly sampled stream.
+
+    LSL stamps samples when they arrive, so a chunk's timestamps carry the network and driver jitter. With a
+    constant sampling rate every timestamp should sit on a line of sample index, so a recursive least squares line
+    is fitted to (index, timestamp) and each chunk gets its timestamps back from the fit. Older samples are
+    forgotten with a half-life of `halftime` seconds so the fit follows slow changes.
+
+    Parameters
+    ----------
+    sfreq : float
+        nominal sampling rate of the stream.
+
+    halftime : float
+        seconds after which a sample has half of its original weight in the fit.
+    """
+
+    def __init__(self, sfreq: float, halftime: float = 90.) -> None:
+
+        self.sfreq = sfreq
+        self.forget = 0.5 ** (1 / (sfreq * halftime))
+
+        self._n_samples = 0
+        self._origin = None
+        self._sums = np.zeros(5)
+
+    def process(self, timestamps) -> np.ndarray:
+        """
+        Updates the fit with a chunk of timestamps and returns them smoothed. Every chunk of the stream has to go
+        through here, including the ones that aren't kept, since the fit counts samples.
+
+        Parameters
+        ----------
+        timestamps : list or numpy.ndarray
+            timestamps of the next chunk.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        n_new = len(timestamps)
+        if not n_new:
+            return timestamps
+
+        if self._origin is None:
+            self._origin = timestamps[0]
+
+        x = np.arange(self._n_samples, self._n_samples + n_new, dtype=np.float64)
+        y = timestamps - self._origin
+        w = self.forget ** np.arange(n_new - 1, -1, -1)
+
+        # weighted sums of 1, x, y, x*x and x*y, decayed by the samples that came in since
+        self._sums *= self.forget ** n_new
+        self._sums += np.array([w.sum(), w @ x, w @ y, w @ (x * x), w @ (x * y)])
+        self._n_samples += n_new
+
+        sw, sx, sy, sxx, sxy = self._sums
+        denom = sw * sxx - sx * sx
+        if denom > 0 and self._n_samples > 1:
+            slope = (sw * sxy - sx * sy) / denom
+        else:
+            slope = 1 / self.sfreq
+        intercept = (sy - slope * sx) / sw
+
+        return self._origin + intercept + slope * x
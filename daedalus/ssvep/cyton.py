@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Reads the OpenBCI Cyton board straight from its serial port, without going through an LSL outlet
+"""
+import collections
+import threading
+import time
+import numpy as np
+from pylsl import local_clock
+from daedalus.ssvep.buffers import EEGBuffer
+
+PACKET_SIZE = 33
+HEADER = 0xA0
+FOOTER = 0xC0  # the low nibble of the footer byte tells what the aux bytes hold
+
+SFREQ = 250.
+N_CHANS = 8
+UV_PER_COUNT = 4.5 / 24 / (2 ** 23 - 1) * 1e6  # 4.5 V reference, gain of 24
+G_PER_COUNT = 0.002 / 2 ** 4
+
+
+def find_packets(data) -> tuple:
+    """
+    Finds where the complete packets in a byte stream start. Aligned runs of packets are checked in one go; the
+    stream is only searched again after a corrupted or missing byte.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        uint8 bytes read from the board.
+
+    Returns
+    -------
+    tuple
+        packet start indices and the number of bytes that were used up (the rest may be the start of a packet that
+        hasn't fully arrived yet).
+    """
+    starts = []
+    pos = 0
+    while len(data) - pos >= PACKET_SIZE:
+
+        # next place where both the header and the footer are where they should be
+        valid = (data[pos:len(data) - PACKET_SIZE + 1] == HEADER) & \
+                ((data[pos + PACKET_SIZE - 1:] & 0xF0) == FOOTER)
+        candidates = np.flatnonzero(valid)
+        if not candidates.size:
+            pos = len(data) - PACKET_SIZE + 1
+            break
+        first = pos + candidates[0]
+
+        # most of the time every following packet is aligned with it
+        run = first + PACKET_SIZE * np.arange((len(data) - first) // PACKET_SIZE)
+        aligned = (data[run] == HEADER) & ((data[run + PACKET_SIZE - 1] & 0xF0) == FOOTER)
+        n_good = len(run) if aligned.all() else int(np.argmin(aligned))
+
+        starts.append(run[:n_good])
+        pos = first + PACKET_SIZE * n_good
+
+    starts = np.concatenate(starts) if starts else np.empty(0, dtype=int)
+
+    return starts, pos
+
+
+def decode_packets(data) -> tuple:
+    """
+    Decodes every complete packet in a chunk of bytes from the board.
+
+    The 24-bit big-endian channel values are assembled and sign-extended for all packets and channels at once.
+
+    Parameters
+    ----------
+    data : bytes or numpy.ndarray
+        raw bytes.
+
+    Returns
+    -------
+    tuple
+        (n_packets, 8) EEG in microvolts, (n_packets, 3) accelerometer in g, (n_packets,) sample numbers and the
+        number of bytes used up.
+    """
+    data = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    starts, consumed = find_packets(data)
+
+    packets = data[starts[:, None] + np.arange(PACKET_SIZE)]
+
+    raw = packets[:, 2:26].reshape(-1, N_CHANS, 3).astype(np.int32)
+    counts = (raw[..., 0] << 16) | (raw[..., 1] << 8) | raw[..., 2]
+    counts = (counts ^ 0x800000) - 0x800000
+
+    aux = np.ascontiguousarray(packets[:, 26:32]).view(">i2").astype(np.float32) * G_PER_COUNT
+
+    return (counts * UV_PER_COUNT).astype(np.float32), aux, packets[:, 1].copy(), consumed
+
+
+def encode_packets(eeg, aux=None, first_sample: int = 0) -> bytes:
+    """
+    Builds the bytes the board would send for the given data, e.g. to make streams for ReplaySerial.
+
+    Parameters
+    ----------
+    eeg : numpy.ndarray
+        (n_samples, 8) EEG in microvolts.
+
+    aux : numpy.ndarray
+        (n_samples, 3) accelerometer in g, zeros by default.
+
+    first_sample : int
+        sample number of the first packet.
+
+    Returns
+    -------
+    bytes
+    """
+    eeg = np.asarray(eeg, dtype=np.float64)
+    n_samples = len(eeg)
+    if aux is None:
+        aux = np.zeros((n_samples, 3))
+
+    packets = np.zeros((n_samples, PACKET_SIZE), dtype=np.uint8)
+    packets[:, 0] = HEADER
+    packets[:, 1] = (first_sample + np.arange(n_samples)) % 256
+    counts = np.round(eeg / UV_PER_COUNT).astype(np.int64) & 0xFFFFFF
+    packets[:, 2:26] = np.stack([counts >> 16, counts >> 8, counts], axis=2).reshape(n_samples, -1) & 0xFF
+    packets[:, 26:32] = np.round(np.asarray(aux) / G_PER_COUNT).astype(">i2").view(np.uint8).reshape(n_samples, -1)
+    packets[:, 32] = FOOTER
+
+    return packets.tobytes()
+
+
+class CytonReader(threading.Thread):
+    """
+    Reads the Cyton's serial port on its own thread and writes the decoded samples into an EEGBuffer (or anything
+    with the same append() method, like a ChunkedWriter), so it can replace the LSL path in StreamRecorder-style code.
+
+    Samples are timestamped on the local clock when their bytes arrive, spaced back from the newest one at the
+    board's sampling rate.
+
+    Parameters
+    ----------
+    port : str or serial.Serial
+        serial device (e.g. "/dev/ttyUSB0") or an already open port such as ReplaySerial.
+
+    buffer : EEGBuffer
+        where samples go. A new 8-channel buffer is made if not given.
+
+    lock : threading.Lock
+        lock guarding the buffer, for sharing it with readers.
+
+    read_size : int
+        bytes requested from the port per read.
+
+    baud : int
+        baud rate, used when `port` is a device name.
+    """
+
+    def __init__(self, port, buffer: EEGBuffer = None, lock: threading.Lock = None, read_size: int = 33 * 25,
+                 baud: int = 115200) -> None:
+
+        super().__init__(name="CytonAcquisition", daemon=True)
+
+        if isinstance(port, str):
+            import serial
+            port = serial.Serial(port, baud, timeout=0.1)
+
+        self.port = port
+        self.read_size = read_size
+        self.buffer = buffer if buffer is not None else EEGBuffer(N_CHANS, read_size // PACKET_SIZE)
+        self.lock = lock if lock is not None else threading.Lock()
+        self.aux = collections.deque()
+        self.drop_log = collections.deque()
+
+        self._pending = np.empty(0, dtype=np.uint8)
+        self._last_sample = None
+        self._running = threading.Event()
+
+    def run(self) -> None:
+
+        self.port.write(b"b")
+        self._running.set()
+        while self._running.is_set():
+            self.read()
+        self.port.write(b"s")
+
+    def stop(self) -> None:
+        """
+        Asks the thread to stop the board and finish after the current read.
+        """
+        self._running.clear()
+
+    def read(self) -> int:
+        """
+        Reads what's on the port, decodes the complete packets and appends them to the buffer.
+
+        Returns
+        -------
+        int
+            number of samples added.
+        """
+        raw = self.port.read(self.read_size)
+        arrived = local_clock()
+        if not raw:
+            return 0
+
+        data = np.concatenate([self._pending, np.frombuffer(raw, dtype=np.uint8)])
+        eeg, aux, numbers, consumed = decode_packets(data)
+        self._pending = data[consumed:]
+
+        n_new = len(eeg)
+        if not n_new:
+            return 0
+
+        # sample numbers count up mod 256, anything else means packets were lost
+        last = int(numbers[0]) - 1 if self._last_sample is None else self._last_sample
+        lost = int(((np.diff(numbers.astype(int), prepend=last) - 1) % 256).sum())
+        if lost:
+            self.drop_log.append((arrived, lost))
+        self._last_sample = int(numbers[-1])
+
+        stamps = arrived - np.arange(n_new - 1, -1, -1) / SFREQ
+        with self.lock:
+            self.buffer.append(eeg, stamps)
+        self.aux.append(aux)
+
+        return n_new
+
+
+class ReplaySerial:
+    """
+    Stand-in for serial.Serial that plays back bytes recorded from a board, for testing without hardware.
+
+    Parameters
+    ----------
+    data : bytes or str
+        the recorded bytes, or the path of a file holding them.
+
+    realtime : bool
+        pace reads at the board's data rate (250 packets per second) instead of returning as fast as possible.
+
+    loop : bool
+        start over at the end instead of returning empty reads.
+    """
+
+    def __init__(self, data, realtime: bool = False, loop: bool = False) -> None:
+
+        if isinstance(data, str):
+            with open(data, "rb") as f:
+                data = f.read()
+
+        self.data = bytes(data)
+        self.realtime = realtime
+        self.loop = loop
+        self.commands = []
+        self.is_open = True
+
+        self._pos = 0
+        self._started = None
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.data) - self._pos
+
+    def read(self, size: int = 1) -> bytes:
+        """
+        Returns the next `size` bytes (fewer at the end of the recording, or before they'd have arrived in realtime).
+        """
+        if self._pos >= len(self.data) and self.loop:
+            self._pos = 0
+            self._started = None
+
+        stop = min(self._pos + size, len(self.data))
+        if self.realtime:
+            if self._started is None:
+                self._started = time.perf_counter() - self._pos / (PACKET_SIZE * SFREQ)
+            arrived = int((time.perf_counter() - self._started) * PACKET_SIZE * SFREQ)
+            if arrived < stop:
+                time.sleep((stop - arrived) / (PACKET_SIZE * SFREQ))
+
+        out = self.data[self._pos:stop]
+        self._pos = stop
+
+        return out
+
+    def write(self, data: bytes) -> int:
+        """
+        Keeps the commands sent to the board so they can be checked.
+        """
+        self.commands.append(bytes(data))
+        return len(data)
+
+    def reset_input_buffer(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.is_open = False
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Online SSVEP frequency detection with CCA and filter-bank CCA
+"""
+import collections
+import functools
+import numpy as np
+from pylsl import local_clock
+from scipy import signal
+from daedalus.ssvep.filters import design_bandpass
+
+# one decoding result: the detected frequency (None if nothing passed the threshold), its index, the scores of all
+# candidate frequencies, the timestamp of the newest sample in the window and how old that sample was
+Decision = collections.namedtuple("Decision", ["freq", "index", "scores", "timestamp", "latency"])
+
+
+@functools.lru_cache(maxsize=32)
+def reference_signals(freqs: tuple, sfreq: float, n_samples: int, n_harmonics: int = 3) -> np.ndarray:
+    """
+    Sine/cosine templates of the flicker frequencies and their harmonics.
+
+    Parameters
+    ----------
+    freqs : tuple
+        flicker frequencies in Hz.
+
+    sfreq : float
+        sampling rate.
+
+    n_samples : int
+        window length in samples.
+
+    n_harmonics : int
+        number of harmonics (including the fundamental) per frequency.
+
+    Returns
+    -------
+    numpy.ndarray
+        read-only (n_freqs, n_samples, 2 * n_harmonics) templates.
+    """
+    t = np.arange(n_samples) / sfreq
+    phase = 2 * np.pi * np.multiply.outer(np.asarray(freqs, dtype=np.float64), np.arange(1, n_harmonics + 1))
+    phase = phase[:, None, :] * t[None, :, None]
+
+    refs = np.concatenate([np.sin(phase), np.cos(phase)], axis=2)
+    refs.setflags(write=False)
+
+    return refs
+
+
+@functools.lru_cache(maxsize=32)
+def _reference_bases(freqs: tuple, sfreq: float, n_samples: int, n_harmonics: int) -> np.ndarray:
+    """
+    Orthonormal bases of the (centered) templates. They never change for a given window so their QR is cached too.
+    """
+    refs = reference_signals(freqs, sfreq, n_samples, n_harmonics)
+    bases = np.linalg.qr(refs - refs.mean(axis=1, keepdims=True))[0]
+    bases.setflags(write=False)
+
+    return bases
+
+
+def cca_scores(window, freqs, sfreq: float, n_harmonics: int = 3) -> np.ndarray:
+    """
+    Largest canonical correlation between an EEG window and the templates of every candidate frequency.
+
+    The canonical correlations of two data sets are the singular values of Qx' Qy, with Qx and Qy orthonormal bases
+    of the two. The EEG basis is computed once and all frequencies go through a single batched SVD.
+
+    Parameters
+    ----------
+    window : numpy.ndarray
+        (n_channels, n_samples) EEG.
+
+    freqs : list
+        candidate flicker frequencies in Hz.
+
+    sfreq : float
+        sampling rate.
+
+    n_harmonics : int
+        harmonics per frequency in the templates.
+
+    Returns
+    -------
+    numpy.ndarray
+        (n_freqs,) correlations.
+    """
+    window = np.asarray(window, dtype=np.float64)
+    bases = _reference_bases(tuple(freqs), float(sfreq), window.shape[1], n_harmonics)
+
+    eeg = window.T - window.mean(axis=1)
+    eeg_basis = np.linalg.qr(eeg)[0]
+
+    return np.linalg.svd(eeg_basis.T @ bases, compute_uv=False)[:, 0]
+
+
+@functools.lru_cache(maxsize=32)
+def filter_bank(sfreq: float, n_bands: int = 5, band_width: float = 8., high: float = 88., order: int = 4,
+                margin: float = 2.) -> tuple:
+    """
+    Band-pass filters of a filter-bank CCA. The n-th band passes n * band_width Hz and up and they all end at `high`
+    (or just below Nyquist).
+
+    The Butterworth cutoffs are put `margin` Hz below n * band_width: at the cutoff itself a frequency is already
+    3 dB down, which would weaken the lowest flicker frequency (and its harmonics) in the band meant to carry it.
+    Chen et al. get the same from a Chebyshev pass band starting at n * band_width with the stop band 2 Hz below.
+
+    Returns
+    -------
+    tuple
+        second-order sections of every band.
+    """
+    return tuple(design_bandpass(band_width * (i + 1) - margin, high, sfreq, order) for i in range(n_bands))
+
+
+def fbcca_scores(window, freqs, sfreq: float, n_harmonics: int = 3, n_bands: int = 5, a: float = 1.25,
+                 b: float = .25) -> np.ndarray:
+    """
+    Filter-bank CCA (Chen et al., 2015): CCA in several sub-bands, combined with weights n^-a + b that favour the
+    lower bands.
+
+    Every window is filtered with the filters' initial state set to the steady state of its first sample
+    (sosfilt_zi), as if the signal had been at that level before the window. Starting from rest instead puts the
+    filters' start-up transient over the first part of every window, which is a large part of a short online one.
+
+    Parameters
+    ----------
+    window : numpy.ndarray
+        (n_channels, n_samples) EEG.
+
+    freqs : list
+        candidate flicker frequencies in Hz.
+
+    sfreq : float
+        sampling rate.
+
+    n_harmonics : int
+        harmonics per frequency in the templates.
+
+    n_bands : int
+        number of sub-bands.
+
+    a, b : float
+        sub-band weight parameters.
+
+    Returns
+    -------
+    numpy.ndarray
+        (n_freqs,) scores.
+    """
+    window = np.asarray(window, dtype=np.float64)
+    weights = np.arange(1, n_bands + 1) ** -a + b
+
+    scores = np.zeros(len(freqs))
+    for weight, sos in zip(weights, filter_bank(float(sfreq), n_bands)):
+        zi = np.einsum("sk,c->sck", signal.sosfilt_zi(sos), window[:, 0])
+        band = signal.sosfilt(sos, window, axis=1, zi=zi)[0]
+        scores += weight * cca_scores(band, freqs, sfreq, n_harmonics) ** 2
+
+    return scores
+
+
+class SSVEPDecoder:
+    """
+    Classifies the latest window of a running recording as one of the flicker frequencies.
+
+    Call decide() whenever a decision is needed (e.g. once per frame or per trial), it only reads the last
+    `window` seconds of the buffer::
+
+        decoder = SSVEPDecoder(recorder, freqs=[8.57, 10, 12, 15], sfreq=250)
+        decision = decoder.decide()
+        if decision is not None and decision.freq is not None:
+            ...
+
+    Parameters
+    ----------
+    recorder : daedalus.ssvep.acquisition.StreamRecorder
+        anything with a latest(n_samples) method returning (data, timestamps).
+
+    freqs : list
+        candidate flicker frequencies in Hz.
+
+    sfreq : float
+        sampling rate.
+
+    window : float
+        window length in seconds.
+
+    method : str
+        "cca" or "fbcca".
+
+    n_harmonics : int
+        harmonics per frequency in the templates.
+
+    n_bands : int
+        number of sub-bands for "fbcca".
+
+    threshold : float
+        minimum score for a frequency to be reported. Below it Decision.freq is None.
+
+    max_latency : float
+        windows whose newest sample is older than this (in seconds) aren't classified.
+
+    picks : list
+        channel indices to use, all by default.
+    """
+
+    def __init__(self, recorder, freqs: list, sfreq: float, window: float = 1., method: str = "fbcca",
+                 n_harmonics: int = 3, n_bands: int = 5, threshold: float = None, max_latency: float = None,
+                 picks: list = None) -> None:
+
+        if method not in ("cca", "fbcca"):
+            raise ValueError(f"Unknown method {method}, use 'cca' or 'fbcca'.")
+
+        self.recorder = recorder
+        self.freqs = list(freqs)
+        self.sfreq = sfreq
+        self.n_samples = int(round(window * sfreq))
+        self.method = method
+        self.n_harmonics = n_harmonics
+        self.n_bands = n_bands
+        self.threshold = threshold
+        self.max_latency = max_latency
+        self.picks = picks
+
+    def decide(self) -> Decision:
+        """
+        Classifies the newest window.
+
+        Returns
+        -------
+        Decision
+            or None if there isn't a full window yet or it's older than max_latency.
+        """
+        data, stamps = self.recorder.latest(self.n_samples)
+        if len(stamps) < self.n_samples:
+            return None
+
+        latency = local_clock() - stamps[-1]
+        if self.max_latency is not None and latency > self.max_latency:
+            return None
+
+        if self.picks is not None:
+            data = data[self.picks]
+
+        scores = self.score(data)
+        best = int(np.argmax(scores))
+        freq = self.freqs[best]
+        if self.threshold is not None and scores[best] < self.threshold:
+            freq = None
+
+        return Decision(freq, best, scores, stamps[-1], latency)
+
+    def score(self, data) -> np.ndarray:
+        """
+        Scores of every candidate frequency for a (n_channels, n_samples) window.
+        """
+        if self.method == "cca":
+            return cca_scores(data, self.freqs, self.sfreq, self.n_harmonics)
+
+        return fbcca_scores(data, self.freqs, self.sfreq, self.n_harmonics, self.n_bands)
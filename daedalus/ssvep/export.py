@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Binary export of recordings and conversion to CSV on demand
+"""
+from concurrent.futures import ProcessPoolExecutor
+import io
+import json
+import os
+import numpy as np
+
+
+def save_binary(base_path: str, eeg_data, event_data, chan_names: list, sfreq: float, subject: dict = None,
+                event_id: dict = None) -> dict:
+    """
+    Saves a recording as raw float32 .npy files with a JSON header next to them.
+
+    Parameters
+    ----------
+    base_path : str
+        path of the recording without extension. Files are named {base_path}_raw.npy, {base_path}_eve.npy and
+        {base_path}_raw.json.
+
+    eeg_data : numpy.ndarray
+        (n_channels, n_samples) data.
+
+    event_data : numpy.ndarray
+        events array.
+
+    chan_names : list
+        channel names.
+
+    sfreq : float
+        sampling rate.
+
+    subject : dict
+        subject/session information to keep with the data.
+
+    event_id : dict
+        marker label of the event ids.
+
+    Returns
+    -------
+    dict
+        paths of the "eeg", "events" and "header" files.
+    """
+    paths = {
+        "eeg": base_path + "_raw.npy",
+        "events": base_path + "_eve.npy",
+        "header": base_path + "_raw.json"
+    }
+
+    eeg_data = np.asarray(eeg_data, dtype=np.float32)
+    np.save(paths["eeg"], eeg_data)
+    np.save(paths["events"], np.asarray(event_data))
+
+    header = {
+        "layout": "channels",
+        "dtype": eeg_data.dtype.str,
+        "shape": list(eeg_data.shape),
+        "sfreq": sfreq,
+        "chan_names": list(chan_names),
+        "subject": subject or {},
+        "events": os.path.basename(paths["events"]),
+        "event_id": event_id or {}
+    }
+    with open(paths["header"], "w") as f:
+        json.dump(header, f, indent=2, default=str)
+
+    return paths
+
+
+def events_path(raw_path: str) -> str:
+    """
+    Event FIF file that goes with a raw FIF file: {dir}/{name}_raw.fif -> {dir}/event_{name}-eve.fif. save_data and
+    ChunkedWriter.finalize write events there and the feature extraction reads them from there.
+
+    Parameters
+    ----------
+    raw_path : str
+        path of the raw FIF file.
+
+    Returns
+    -------
+    str
+    """
+    folder, fname = os.path.split(raw_path)
+    name = os.path.splitext(fname)[0]
+    name = name[:-len("_raw")] if name.endswith("_raw") else name
+
+    return os.path.join(folder, "event_{}-eve.fif".format(name))
+
+
+def to_csv(npy_path: str, csv_path: str = None, block_rows: int = 50000, n_jobs: int = None, fmt: str = "%.6g") -> str:
+    """
+    Converts a saved recording to CSV with one sample per row. Row blocks are formatted in parallel worker processes
+    (each one memory-maps the file) and written in order.
+
+    Parameters
+    ----------
+    npy_path : str
+        .npy file made by save_binary().
+
+    csv_path : str
+        output file, same name as the .npy file by default.
+
+    block_rows : int
+        number of samples formatted by each worker call.
+
+    n_jobs : int
+        number of worker processes, all cores by default.
+
+    fmt : str
+        number format passed to np.savetxt.
+
+    Returns
+    -------
+    str
+        path of the CSV file.
+    """
+    if csv_path is None:
+        csv_path = os.path.splitext(npy_path)[0] + ".csv"
+
+    n_samples = np.load(npy_path, mmap_mode="r").shape[1]
+    starts = range(0, n_samples, block_rows)
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool, open(csv_path, "w") as f:
+        blocks = pool.map(_format_block, [npy_path] * len(starts), starts, [block_rows] * len(starts),
+                          [fmt] * len(starts))
+        for block in blocks:
+            f.write(block)
+
+    return csv_path
+
+
+def _format_block(npy_path: str, start: int, n_rows: int, fmt: str) -> str:
+    """
+    Formats samples [start, start + n_rows) of a saved recording as CSV text.
+    """
+    data = np.load(npy_path, mmap_mode="r")
+    out = io.StringIO()
+    np.savetxt(out, data[:, start:start + n_rows].T, delimiter=",", fmt=fmt)
+
+    return out.getvalue()
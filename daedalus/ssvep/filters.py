@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Causal IIR filtering of streams chunk by chunk
+"""
+import numpy as np
+from scipy import signal
+
+
+def design_bandpass(low: float, high: float, sfreq: float, order: int = 4) -> np.ndarray:
+    """
+    Butterworth band-pass filter.
+
+    Parameters
+    ----------
+    low, high : float
+        pass band edges in Hz. `high` is capped just below Nyquist.
+
+    sfreq : float
+        sampling rate.
+
+    order : int
+        filter order.
+
+    Returns
+    -------
+    numpy.ndarray
+        second-order sections.
+    """
+    return signal.butter(order, [low, min(high, 0.45 * sfreq)], btype="bandpass", fs=sfreq, output="sos")
+
+
+def design_notch(freq: float, sfreq: float, quality: float = 30.) -> np.ndarray:
+    """
+    IIR notch filter, e.g. for line noise.
+
+    Parameters
+    ----------
+    freq : float
+        frequency to remove in Hz.
+
+    sfreq : float
+        sampling rate.
+
+    quality : float
+        quality factor, higher is narrower.
+
+    Returns
+    -------
+    numpy.ndarray
+        second-order sections.
+    """
+    return signal.tf2sos(*signal.iirnotch(freq, quality, fs=sfreq))
+
+
+class StreamingFilter:
+    """
+    Applies a cascade of second-order sections to consecutive chunks of a multichannel stream.
+
+    The filter state of every section and channel is carried from one chunk to the next, so filtering a recording
+    chunk by chunk gives the same result as filtering it in one go with scipy.signal.sosfilt. All channels go
+    through one sosfilt call per chunk.
+
+    Parameters
+    ----------
+    sos : numpy.ndarray
+        (n_sections, 6) second-order sections, e.g. np.vstack of a band-pass and a notch.
+
+    n_chans : int
+        number of channels.
+    """
+
+    def __init__(self, sos, n_chans: int) -> None:
+
+        self.sos = np.atleast_2d(np.asarray(sos, dtype=np.float64))
+        self.n_chans = n_chans
+        self.zi = np.zeros((len(self.sos), n_chans, 2))
+
+    def process(self, chunk) -> np.ndarray:
+        """
+        Filters the next chunk.
+
+        Parameters
+        ----------
+        chunk : numpy.ndarray
+            (n_channels, n_samples) data.
+
+        Returns
+        -------
+        numpy.ndarray
+            (n_channels, n_samples) filtered data.
+        """
+        filtered, self.zi = signal.sosfilt(self.sos, chunk, axis=1, zi=self.zi)
+
+        return filtered
+
+    def reset(self) -> None:
+        """
+        Clears the filter state, e.g. after a gap in the stream.
+        """
+        self.zi[:] = 0
+
+
+class FilterBank:
+    """
+    A set of band-pass filters (with an optional shared notch) run side by side on the same stream, as used for
+    filter-bank CCA or for monitoring several bands.
+
+    Parameters
+    ----------
+    sfreq : float
+        sampling rate.
+
+    n_chans : int
+        number of channels.
+
+    bands : list
+        (low, high) pass band of every filter in Hz.
+
+    notch : float
+        line noise frequency to remove from every band, or None.
+
+    order : int
+        order of the band-pass filters.
+    """
+
+    def __init__(self, sfreq: float, n_chans: int, bands: list, notch: float = None, order: int = 4) -> None:
+
+        self.sfreq = sfreq
+        self.bands = list(bands)
+
+        self.filters = []
+        for low, high in self.bands:
+            sos = design_bandpass(low, high, sfreq, order)
+            if notch is not None:
+                sos = np.vstack([sos, design_notch(notch, sfreq)])
+            self.filters.append(StreamingFilter(sos, n_chans))
+
+    def process(self, chunk) -> np.ndarray:
+        """
+        Filters the next chunk through every band.
+
+        Parameters
+        ----------
+        chunk : numpy.ndarray
+            (n_channels, n_samples) data.
+
+        Returns
+        -------
+        numpy.ndarray
+            (n_bands, n_channels, n_samples) filtered data.
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+
+        return np.stack([filt.process(chunk) for filt in self.filters])
+
+    def reset(self) -> None:
+        """
+        Clears the state of every band.
+        """
+        for filt in self.filters:
+            filt.reset()
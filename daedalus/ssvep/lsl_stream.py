@@ -6,49 +6,187 @@ created 1/13/20
 
 DESCRIPTION
 """
-from pylsl import StreamInlet, StreamOutlet, StreamInfo, resolve_byprop, local_clock
-from pyOpenBCI import OpenBCICyton
+from pylsl import StreamInlet, StreamOutlet, StreamInfo, resolve_byprop, resolve_bypred, local_clock
+from pylsl import cf_float32, cf_double64, cf_int32, cf_int16, cf_int8, cf_int64
 from psychopy import data, core
+from concurrent.futures import ThreadPoolExecutor
 import collections
+import threading
 import numpy as np
 import mne
 import os
+from daedalus.ssvep.buffers import EEGBuffer
+from daedalus.ssvep.export import save_binary, to_csv, events_path
+from daedalus.ssvep.alignment import align_markers
+from daedalus.ssvep.clock import ClockSync, Dejitter
+
+# numpy types matching the LSL channel formats that pull_chunk can write into directly (every numeric format)
+LSL_DTYPES = {
+    cf_float32: np.float32,
+    cf_double64: np.float64,
+    cf_int32: np.int32,
+    cf_int16: np.int16,
+    cf_int8: np.int8,
+    cf_int64: np.int64
+}
+
+# streams found by resolve_stream() by (name, source_id): (StreamInfo, local_clock() when found)
+_stream_cache = {}
+_stream_cache_lock = threading.Lock()
+
+
+def lsl_dtype(info):
+    """
+    Numpy type of a stream's samples, the one pull_chunk writes into a buffer given as dest_obj
+
+    Parameters
+    ----------
+    info (pylsl.StreamInfo) the stream
+
+    Returns
+    -------
+    dtype (type) numpy scalar type of the stream's channel format
+    """
+    channel_format = info.channel_format()
+    if channel_format not in LSL_DTYPES:
+        raise ValueError("Stream {} has channel format {} which can't be buffered, only numeric streams "
+                         "can.".format(info.name(), channel_format))
+
+    return LSL_DTYPES[channel_format]
+
+
+def stream_key(stream):
+    """
+    (name, source_id) of a stream given by name or as a (name, source_id) pair. Outlets that share a name (e.g. two
+    amplifiers) are told apart by their source_id, which is None when any of them will do
+
+    Parameters
+    ----------
+    stream (str or tuple) name of the outlet, or (name, source_id)
+
+    Returns
+    -------
+    key (tuple) (name, source_id)
+    """
+    if isinstance(stream, str):
+        return stream, None
+
+    name, source_id = stream
+    return name, source_id
+
+
+def resolve_stream(name, timeout=2, ttl=300, source_id=None):
+    """
+    Finds a stream by name (and source_id), reusing what was found before if it's recent enough
+
+    Parameters
+    ----------
+    name (str) name of the outlet
+    timeout (float) how long to look for the stream in seconds
+    ttl (float) how long (in seconds) a resolved stream is reused before looking for it again
+    source_id (str) source_id of the outlet, any outlet with the name if None
+
+    Returns
+    -------
+    info (pylsl.StreamInfo) the stream, or None if it wasn't found
+    """
+    key = (name, source_id)
+    now = local_clock()
+    with _stream_cache_lock:
+        cached = _stream_cache.get(key)
+    if cached is not None and now - cached[1] < ttl:
+        return cached[0]
+
+    if source_id is None:
+        stream = resolve_byprop('name', name, timeout=timeout)
+    else:
+        stream = resolve_bypred("name='{}' and source_id='{}'".format(name, source_id), timeout=timeout)
+    if not len(stream):
+        return None
+
+    with _stream_cache_lock:
+        _stream_cache[key] = (stream[0], now)
 
+    return stream[0]
 
-def get_streams(stream_names, chunk_size):
+
+def clear_stream_cache(name=None, source_id=None):
+    """
+    Forgets resolved streams so they're looked up again, e.g. after a stream was restarted
+
+    Parameters
+    ----------
+    name (str) name of the stream to forget, all of them if None
+    source_id (str) source_id of the stream to forget, every stream with the name if None
+    """
+    with _stream_cache_lock:
+        for key in list(_stream_cache):
+            if name is None or (key[0] == name and source_id in (None, key[1])):
+                del _stream_cache[key]
+
+
+def get_streams(stream_names, chunk_size, timeout=2, ttl=300):
     """
     Receives all specified streams
 
     Parameters
     ----------
-    stream_names (list) name of all the outlets
+    stream_names (list) name of all the outlets, or (name, source_id) pairs for outlets that share a name
     chunk_size (int) number of chunks in each sample
+    timeout (float) how long to look for each stream in seconds, all of them are looked for at the same time
+    ttl (float) how long (in seconds) streams found by earlier calls are reused without looking for them again
 
     Returns
     -------
-    inlets (dict) LSL streams with their name as key and StreamInlet object as value
+    inlets (dict) LSL streams with their name (or (name, source_id) pair, as given) as key and StreamInlet object
+    as value
     """
     inlets = collections.defaultdict(dict)
+    keys = [stream_key(stream) for stream in stream_names]
+    labels = [name if source_id is None else "{} ({})".format(name, source_id) for name, source_id in keys]
 
-    # loop through the names and find the streams that match
-    for name in stream_names:
-        print("looking for {} stream...".format(name))
-        stream = resolve_byprop('name', name, timeout=2)
-        if len(stream):
-            print("{} found!\n\n".format(name))
-        else:
-            raise RuntimeError("Can't find the stream")
+    # look for all the names at once so startup takes one timeout at most, not one per stream
+    print("looking for {} streams...".format(", ".join(labels)))
+    with ThreadPoolExecutor(max_workers=max(len(keys), 1)) as pool:
+        streams = list(pool.map(lambda key: resolve_stream(key[0], timeout, ttl, source_id=key[1]), keys))
+
+    missing = [label for label, stream in zip(labels, streams) if stream is None]
+    if missing:
+        raise RuntimeError("Can't find the stream(s): {}".format(", ".join(missing)))
 
-        # don't want to read the markers in chunks
+    for spec, (name, _), label, stream in zip(stream_names, keys, labels, streams):
+        print("{} found!\n\n".format(label))
+
+        # don't want to read the markers in chunks. recover=True reconnects to a restarted outlet with the same
+        # source_id on its own
         if name == "Markers":
-            inlets[name] = StreamInlet(stream[0])
+            inlets[spec] = StreamInlet(stream, recover=True)
         else:
-            inlets[name] = StreamInlet(stream[0], max_chunklen=chunk_size)
+            inlets[spec] = StreamInlet(stream, max_chunklen=chunk_size, recover=True)
 
     return inlets
 
 
-def get_raw_eeg(inlets, record_time, chunk_size, debug=False):
+def reconnect(name, chunk_size, timeout=2):
+    """
+    Makes a new inlet for a stream that was lost (e.g. pull_chunk raised pylsl.LostError), looking it up again
+
+    Parameters
+    ----------
+    name (str or tuple) name of the outlet, or (name, source_id) as given to get_streams()
+    chunk_size (int) number of chunks in each sample
+    timeout (float) how long to look for the stream in seconds
+
+    Returns
+    -------
+    inlet (pylsl.StreamInlet)
+    """
+    clear_stream_cache(*stream_key(name))
+
+    return get_streams([name], chunk_size, timeout=timeout)[name]
+
+
+def get_raw_eeg(inlets, record_time, chunk_size, debug=False, writer=None, sync_interval=5., event_id=None):
     """
      Reads LSL inlets and parses data to MNE-fif format
 
@@ -58,12 +196,17 @@ def get_raw_eeg(inlets, record_time, chunk_size, debug=False):
      record_time (float) duration to record data
      chunk_size (int) number of chunks in each sample
      debud (bool) show debug messages or not
+     writer (ChunkedWriter) if given, samples are streamed to disk through it instead of being kept in memory
+     sync_interval (float) seconds between two time_correction() calls on each inlet
+     event_id (dict) event ids of marker labels, labels missing from it are given one (see alignment.marker_codes)
 
      Returns
      -------
-     eeg_data (dict) holding raw_eeg, raw_events, and the drop_log
+     eeg_data (dict) holding raw_eeg, raw_events, the drop_log, the (corrected) eeg timestamps and the event_id of
+        the marker labels. With a writer raw_eeg is a memmap of the file.
     """ 
     # get the EEG and Markers inlets into local variables
+    marker_inlet = None
     eeg_found = 0
     for key, val in inlets.items():
         if val.info().type() == "EEG":
@@ -78,12 +221,18 @@ def get_raw_eeg(inlets, record_time, chunk_size, debug=False):
     # setup values for EEG
     eeg_info = eeg_inlet.info()
     n_chans = eeg_info.channel_count()
-    eeg_ls = collections.deque()
-    eeg_ts = collections.deque()
-    eeg_tc = collections.deque()
+    eeg_dtype = lsl_dtype(eeg_info)
+    if writer is None:
+        eeg_buffer = EEGBuffer(n_chans, chunk_size, dtype=eeg_dtype)
+    elif writer.dtype != eeg_dtype:
+        raise ValueError("The EEG stream sends {} samples but the writer holds {}.".format(np.dtype(eeg_dtype),
+                                                                                           writer.dtype))
+    else:
+        eeg_buffer = writer
 
     # setup values for Markers
     marker_ls = collections.deque()
+    marker_ts = collections.deque()
 
     # keep track of the recording
     drop_log = collections.deque()
@@ -91,9 +240,13 @@ def get_raw_eeg(inlets, record_time, chunk_size, debug=False):
 
     # start timing
     t_init = local_clock()
-    eeg_correction = eeg_inlet.time_correction()
+    eeg_clock = ClockSync(eeg_inlet, interval=sync_interval)
     if marker_inlet:
-        marker_correction = marker_inlet.time_correction()
+        marker_clock = ClockSync(marker_inlet, interval=sync_interval)
+
+    # regularly sampled streams get their timestamps smoothed too
+    eeg_sfreq = eeg_info.nominal_srate()
+    dejitter = Dejitter(eeg_sfreq) if eeg_sfreq > 0 else None
 
     # start recording
     if debug:
@@ -101,93 +254,111 @@ def get_raw_eeg(inlets, record_time, chunk_size, debug=False):
 
     while (local_clock() - t_init) < record_time:
         try:
-            eeg_data, eeg_timestamp = eeg_inlet.pull_chunk(timeout=2, max_samples=chunk_size)
+            # pylsl copies the chunk straight into the buffer, it only counts once committed
+            _, eeg_timestamp = eeg_inlet.pull_chunk(timeout=2, max_samples=chunk_size,
+                                                    dest_obj=eeg_buffer.reserve())
             if eeg_timestamp:
-                eeg_correction = eeg_inlet.time_correction()
-                if len(eeg_data) != chunk_size:
+                # the clock model only calls time_correction() once every sync_interval
+                eeg_clock.update()
+                if dejitter is not None:
+                    eeg_timestamp = dejitter.process(eeg_timestamp)
+
+                if len(eeg_timestamp) != chunk_size:
                     drop_log.append(chunk_num)
                 else:
-                    eeg_ls.append(eeg_data)
-                    eeg_ts.append(eeg_timestamp)
-                    eeg_tc.append(eeg_correction)
+                    eeg_buffer.commit(eeg_clock.correct(eeg_timestamp))
 
             if marker_inlet:
-                marker_data, marker_timestamp = marker_inlet.pull_sample(timeout=0)
+                # only keep the timestamps here, markers are matched to samples after the recording
+                marker_data, marker_timestamp = marker_inlet.pull_chunk(timeout=0)
 
-                if marker_data:
+                if marker_timestamp:
                     if debug:
                         print("DIN: {}".format(marker_data))
-                    if marker_timestamp == any(eeg_timestamp):
-                        print("NICE")
-                    else:
-                        print("not accurate")
-
-                    marker_ls.append([chunk_num-1, 0, marker_data[0]])
-                    # marker_correction = marker_inlet.time_correction()
-                    # marker_ls.append([chunk_num[0])
-                    # marker_ts.append(marker_timestamp + marker_correction)
+                    marker_clock.update()
+                    marker_ls.extend(sample[0] for sample in marker_data)
+                    marker_ts.extend(marker_clock.correct(marker_timestamp))
             chunk_num += 1
 
         except KeyboardInterrupt:
             break
 
-    t_end = local_clock().getTime()
+    t_end = local_clock()
     tot_rec_t = t_end - t_init
     tot_smps = chunk_num - 1
 
-    # construct the raw data frame for MNE structure (n_channels, n_samples)
-    raw_df = np.array([])
-    for chunk in eeg_ls:
-        this_chunk = np.array(chunk).transpose()
-        if raw_df.size == 0:
-            raw_df = this_chunk
-        else:
-            raw_df = np.concatenate((raw_df, this_chunk), axis=1)
+    # both streams' timestamps are already on the local clock
+    if writer is not None:
+        writer.flush()
+    eeg_ts = eeg_buffer.timestamps()
 
     # the event data frame
-    event_df = np.array(list(marker_ls))
+    event_df, event_id = align_markers(eeg_ts, np.asarray(marker_ts), list(marker_ls), event_id=event_id)
+
+    # construct the raw data frame for MNE structure (n_channels, n_samples)
+    if writer is None:
+        raw_df = eeg_buffer.to_array()
+    else:
+        writer.add_events(event_df, event_id)
+        writer.close()
+        raw_df = writer.data()
 
     # data dict
-    eeg_data = {"eeg_raw": raw_df, "event_raw": event_df, "drop_raw": drop_log}
+    eeg_data = {"eeg_raw": raw_df, "event_raw": event_df, "drop_raw": drop_log, "eeg_ts": eeg_ts,
+                "event_id": event_id}
 
     return eeg_data
 
 
-def save_data(eeg_data, event_data, chan_names, subj, sfreq=250):
+def save_data(eeg_data, event_data, chan_names, subj, sfreq=250, csv=False, event_id=None):
     """
+    Saves the recording as float32 .npy (with a JSON header), MNE raw FIF and event FIF files
 
     Parameters
     ----------
-    eeg_data
-    event_data
-    sfreq
+    eeg_data (numpy.ndarray) raw data of shape (n_channels, n_samples)
+    event_data (numpy.ndarray) events array
+    chan_names (list) channel names
+    subj (dict) subject info with at least Participant and Session
+    sfreq (float) sampling rate
+    csv (bool) also convert the raw data to a (samples x channels) CSV file
+    event_id (dict) marker label of the event ids (get_raw_eeg's "event_id"), kept in the JSON header
 
     Returns
     -------
-
+    paths (dict) paths of the saved files
     """
     curr_date = data.getDateStr()
     dir_name = os.path.join(os.getcwd(), "data", "eeg")
     fname = "{}_session{}_{}".format(subj["Participant"], subj["Session"], curr_date)
+    os.makedirs(dir_name, exist_ok=True)
 
-    print("Saving eeg data to csv file {}.csv".format(fname))
-    print("Saving event data to csv file {}.csv".format(fname))
-    np.savetxt("{}{}_raw.csv".format(dir_name, fname), eeg_data, delimiter=",")
-    np.savetxt("{}{}_eve.csv".format(dir_name, fname), event_data, delimiter=",")
+    print("Saving eeg data to binary file {}_raw.npy".format(fname))
+    print("Saving event data to binary file {}_eve.npy".format(fname))
+    paths = save_binary(os.path.join(dir_name, fname), eeg_data, event_data, chan_names, sfreq, subject=subj,
+                        event_id=event_id)
+
+    if csv:
+        print("Saving eeg data to csv file {}_raw.csv".format(fname))
+        paths["csv"] = to_csv(paths["eeg"])
 
     montage = 'standard_1005'
 
     mne_info = mne.create_info(
         ch_names=chan_names,
         ch_types="eeg",
-        sfreq=sfreq,
-        montage=montage
+        sfreq=sfreq
     )
 
     # custom_epochs = mne.EpochsArray(epoch_data, mne_info, event_data, tmin, event_id)
     raw_mne = mne.io.RawArray(eeg_data, mne_info)
+    raw_mne.set_montage(montage, on_missing="ignore")
 
     print("Saving eeg data to fif file {}.fif".format(fname))
     print("Saving event data to fif file {}.fif".format(fname))
-    raw_mne.save('{}{}_raw.fif'.format(dir_name, fname))
-    mne.write_events('{}event_{}-eve.fif'.format(dir_name, fname), event_data)
\ No newline at end of file
+    paths["fif"] = os.path.join(dir_name, "{}_raw.fif".format(fname))
+    paths["eve_fif"] = events_path(paths["fif"])
+    raw_mne.save(paths["fif"])
+    mne.write_events(paths["eve_fif"], event_data)
+
+    return paths
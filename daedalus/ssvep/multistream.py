@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Records any number of LSL streams together and puts them on one timebase
+"""
+import collections
+import threading
+import numpy as np
+from pylsl import cf_string
+from daedalus.ssvep.acquisition import AcquisitionThread, MarkerThread
+from daedalus.ssvep.alignment import align_markers
+
+
+def channel_labels(info) -> list:
+    """
+    Channel labels from a stream's description, or {stream name}_{number} for streams that don't have them.
+
+    Parameters
+    ----------
+    info : pylsl.StreamInfo
+
+    Returns
+    -------
+    list
+    """
+    labels = []
+    channel = info.desc().child("channels").child("channel")
+    while not channel.empty() and len(labels) < info.channel_count():
+        labels.append(channel.child_value("label"))
+        channel = channel.next_sibling()
+
+    if len(labels) != info.channel_count() or not all(labels):
+        labels = ["{}_{}".format(info.name(), i + 1) for i in range(info.channel_count())]
+
+    return labels
+
+
+class MultiStreamRecorder:
+    """
+    Records several numeric streams (EEG, eye tracking, photodiode, ...) and Markers streams at once, one thread
+    per inlet.
+
+    Every stream keeps its own buffer and its timestamps are moved to the local clock (and dejittered) as they come
+    in, so after the recording synchronize() can resample them all onto one grid::
+
+        recorder = MultiStreamRecorder(get_streams(["obci_eeg1", "tobii", "photodiode", "Markers"], 25), 25)
+        recorder.start()
+        ...
+        try:
+            recorder.stop()
+        finally:
+            synced = recorder.synchronize(sfreq=250)
+
+    Parameters
+    ----------
+    inlets : dict
+        LSL inlets by stream name, as returned by get_streams().
+
+    chunk_size : int
+        maximum number of samples pulled at once from each numeric stream.
+
+    timeout : float
+        seconds each thread waits on its inlet before checking whether it was stopped.
+
+    sync_interval : float
+        seconds between two time_correction() calls on each inlet.
+    """
+
+    def __init__(self, inlets: dict, chunk_size: int, timeout: float = 0.2, sync_interval: float = 5.) -> None:
+
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.sync_interval = sync_interval
+
+        self.inlets = dict(inlets)
+        self.threads = {}
+        self.locks = {name: threading.Lock() for name in self.inlets}
+        self.buffers = {}
+        self.markers = {}
+        self.labels = {}
+
+        for name, inlet in self.inlets.items():
+            if self._is_marker(inlet):
+                self.markers[name] = collections.deque()
+            else:
+                self.labels[name] = channel_labels(inlet.info())
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Starts one acquisition thread per inlet.
+        """
+        for name, inlet in self.inlets.items():
+            if name in self.threads and self.threads[name].is_alive():
+                continue
+
+            if name in self.markers:
+                thread = MarkerThread(inlet, self.timeout, markers=self.markers[name],
+                                      sync_interval=self.sync_interval)
+            else:
+                thread = AcquisitionThread(inlet, self.chunk_size, self.timeout, buffer=self.buffers.get(name),
+                                           lock=self.locks[name], sync_interval=self.sync_interval)
+                self.buffers[name] = thread.buffer
+
+            self.threads[name] = thread
+            thread.start()
+
+    def check(self) -> None:
+        """
+        Raises the exception that stopped a stream's thread (e.g. pylsl.LostError), if one did.
+        """
+        for thread in self.threads.values():
+            thread.check()
+
+    def stop(self) -> None:
+        """
+        Stops every thread and waits for them to finish their last pull. Raises the exception that stopped a thread
+        early, if one did; what was recorded stays in the buffers, so synchronize() still works after it raised.
+        """
+        for thread in self.threads.values():
+            thread.stop()
+        for thread in self.threads.values():
+            thread.join()
+
+        self.check()
+
+    def latest(self, name: str, n_samples: int) -> tuple:
+        """
+        Most recent samples of one numeric stream.
+
+        Parameters
+        ----------
+        name : str
+            stream name.
+
+        n_samples : int
+
+        Returns
+        -------
+        tuple
+            (n_channels, n) data and (n,) timestamps.
+        """
+        if name in self.threads:
+            self.threads[name].check()
+
+        with self.locks[name]:
+            return self.buffers[name].latest(n_samples)
+
+    def synchronize(self, sfreq: float = None, reference: str = None, nearest: list = ()) -> dict:
+        """
+        Resamples every numeric stream onto one timebase covering the time all of them were recording.
+
+        Parameters
+        ----------
+        sfreq : float
+            rate of a regular grid to resample to.
+
+        reference : str
+            name of a stream whose own timestamps are used as the grid instead (e.g. the EEG, so it isn't
+            interpolated at all). One of `sfreq` and `reference` has to be given.
+
+        nearest : list
+            names of streams to resample by taking the nearest sample instead of interpolating, for discrete
+            signals such as triggers or a photodiode.
+
+        Returns
+        -------
+        dict
+            "data": (n_channels, n_times) array of all streams stacked in inlet order, "times": (n_times,) grid,
+            "channels": list of (stream name, channel label) per row, "events": MNE events array per Markers stream
+            (markers outside `times` are dropped), "event_id": {marker label: event id} per Markers stream.
+        """
+        if (sfreq is None) == (reference is None):
+            raise ValueError("Give either sfreq or reference.")
+
+        recorded = {}
+        for name, buffer in self.buffers.items():
+            with self.locks[name]:
+                recorded[name] = buffer.to_array(), buffer.timestamps()
+
+        empty = [name for name, (_, stamps) in recorded.items() if not len(stamps)]
+        if empty:
+            raise RuntimeError("Nothing was recorded from {}.".format(", ".join(map(str, empty))))
+
+        t_start = max(stamps[0] for _, stamps in recorded.values())
+        t_stop = min(stamps[-1] for _, stamps in recorded.values())
+
+        if reference is not None:
+            times = recorded[reference][1]
+            times = times[(times >= t_start) & (times <= t_stop)]
+        else:
+            times = np.arange(t_start, t_stop, 1 / sfreq)
+
+        data, channels = [], []
+        for name, (values, stamps) in recorded.items():
+            data.append(resample(values, stamps, times, nearest=name in nearest))
+            channels.extend((name, label) for label in self.labels[name])
+
+        events, event_ids = {}, {}
+        for name, markers in self.markers.items():
+            markers = list(markers)
+            events[name], event_ids[name] = align_markers(times, [stamp for _, stamp in markers],
+                                                          [marker for marker, _ in markers])
+
+        return {
+            "data": np.concatenate(data, axis=0),
+            "times": times,
+            "channels": channels,
+            "events": events,
+            "event_id": event_ids
+        }
+
+    @staticmethod
+    def _is_marker(inlet) -> bool:
+        """
+        Markers streams and streams with string samples are collected as markers, everything else is buffered.
+        """
+        info = inlet.info()
+        return info.type() == "Markers" or info.channel_format() == cf_string
+
+
+def resample(data, stamps, times, nearest: bool = False) -> np.ndarray:
+    """
+    Resamples a multichannel signal at new times, all channels at once.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        (n_channels, n_samples) signal.
+
+    stamps : numpy.ndarray
+        (n_samples,) increasing timestamps of the samples.
+
+    times : numpy.ndarray
+        times to resample at. Times outside the recording get the first/last sample.
+
+    nearest : bool
+        take the nearest sample instead of interpolating linearly.
+
+    Returns
+    -------
+    numpy.ndarray
+        (n_channels, n_times)
+    """
+    stamps = np.asarray(stamps, dtype=np.float64)
+    if len(stamps) == 1:
+        return np.repeat(data, len(times), axis=1)
+
+    after = np.clip(np.searchsorted(stamps, times), 1, len(stamps) - 1)
+    before = after - 1
+    span = stamps[after] - stamps[before]
+    weight = np.clip((times - stamps[before]) / np.where(span > 0, span, 1), 0, 1)
+
+    if nearest:
+        return data[:, np.where(weight < .5, before, after)]
+
+    return data[:, before] * (1 - weight) + data[:, after] * weight
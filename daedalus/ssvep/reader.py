@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Lazy, memory-mapped access to saved recordings
+"""
+import glob
+import json
+import os
+import numpy as np
+from daedalus.ssvep.writer import load_stream
+
+
+class Recording:
+    """
+    A saved recording opened without reading its samples: save_binary/save_data files ({name}_raw.npy with its
+    _raw.json header and _eve.npy events) or a ChunkedWriter recording ({name}.dat with {name}.json).
+
+    `data` is a (n_channels, n_samples) memory map, so slicing it only touches the part of the file that's used::
+
+        rec = read_recording("data/eeg/01_session1_2026_Oct_18_1200_raw.npy")
+        block = rec.get_data(picks=["O1", "Oz", "O2"], tmin=60, tmax=70)
+        epochs, events = rec.epochs(0, 4)
+
+    Parameters
+    ----------
+    path : str
+        any file of the recording (.npy, .json or .dat) or its path without extension.
+    """
+
+    def __init__(self, path: str) -> None:
+
+        base, ext = os.path.splitext(path)
+        if ext not in (".npy", ".json", ".dat"):
+            base = path
+
+        if os.path.exists(base + ".dat"):
+            self.data, header = load_stream(base)
+            self._events = np.asarray(header.get("events", []), dtype=np.int64).reshape(-1, 3)
+            self._events_path = None
+            self._stamps_path = base + ".ts"
+        else:
+            base = base[:-len("_raw")] if base.endswith("_raw") else base
+            with open(base + "_raw.json") as f:
+                header = json.load(f)
+            self.data = np.load(base + "_raw.npy", mmap_mode="r")
+            self._events = None
+            self._events_path = os.path.join(os.path.dirname(base), header.get("events", ""))
+            self._stamps_path = None
+
+        self.base_path = base
+        self.header = header
+        self.sfreq = float(header["sfreq"])
+        self.subject = header.get("subject") or {}
+        self.event_id = header.get("event_id") or {}
+        self.ch_names = header.get("chan_names") or [f"EEG{i + 1:03d}" for i in range(self.data.shape[0])]
+
+    def __len__(self) -> int:
+        return self.data.shape[1]
+
+    def __getitem__(self, key):
+        """
+        Slices the memory map like an array; channels can be given by name.
+        """
+        if not isinstance(key, tuple):
+            key = (key,)
+        return self.data[(self._pick(key[0]),) + key[1:]]
+
+    @property
+    def shape(self) -> tuple:
+        return self.data.shape
+
+    @property
+    def duration(self) -> float:
+        return len(self) / self.sfreq
+
+    @property
+    def events(self) -> np.ndarray:
+        """
+        MNE events array saved with the recording, read the first time it's needed.
+        """
+        if self._events is None:
+            if self._events_path and os.path.isfile(self._events_path):
+                self._events = np.asarray(np.load(self._events_path), dtype=np.int64).reshape(-1, 3)
+            else:
+                self._events = np.empty((0, 3), dtype=np.int64)
+
+        return self._events
+
+    def timestamps(self) -> np.ndarray:
+        """
+        LSL timestamps of the samples (ChunkedWriter recordings only), memory-mapped too.
+        """
+        if self._stamps_path is None or not len(self):
+            return None
+
+        return np.memmap(self._stamps_path, dtype=np.float64, mode="r", shape=(len(self),))
+
+    def time_slice(self, tmin: float = None, tmax: float = None, picks=None) -> np.ndarray:
+        """
+        View of a time range (tmax excluded) and some channels, nothing is read yet.
+
+        Parameters
+        ----------
+        tmin, tmax : float
+            seconds from the start of the recording. The whole recording by default.
+
+        picks : list
+            channel names or indices, all by default.
+
+        Returns
+        -------
+        numpy.ndarray
+            (n_picks, n_times) memory-mapped view (or a copy if picks isn't a contiguous range).
+        """
+        start = 0 if tmin is None else int(np.clip(round(tmin * self.sfreq), 0, len(self)))
+        stop = len(self) if tmax is None else int(np.clip(round(tmax * self.sfreq), start, len(self)))
+
+        return self.data[self._pick(picks), start:stop]
+
+    def get_data(self, picks=None, tmin: float = None, tmax: float = None, dtype=np.float64) -> np.ndarray:
+        """
+        Reads a time range of some channels into memory.
+        """
+        return np.array(self.time_slice(tmin, tmax, picks), dtype=dtype)
+
+    def epochs(self, tmin: float, tmax: float, event_id=None, picks=None) -> tuple:
+        """
+        Epochs around the saved events, reading only the samples inside them.
+
+        Returns
+        -------
+        tuple
+            (n_epochs, n_channels, n_times) array and the events it belongs to.
+        """
+        from daedalus.analysis.features import epoch_data
+
+        # channels are picked after cutting, indexing the whole memory map with a list would read all of it
+        epochs, events = epoch_data(self.data, self.events, self.sfreq, tmin, tmax, event_id)
+
+        return epochs[:, self._pick(picks)], events
+
+    def _pick(self, picks):
+        """
+        Channel selection for indexing the data: names become indices, ranges stay slices so views stay views.
+        """
+        if picks is None:
+            return slice(None)
+        if isinstance(picks, (str, int, np.integer)):
+            return self._pick([picks])[0]
+        if isinstance(picks, slice):
+            return picks
+
+        idx = [self.ch_names.index(p) if isinstance(p, str) else int(p) for p in picks]
+        if len(idx) > 1 and np.all(np.diff(idx) == 1):
+            return slice(idx[0], idx[-1] + 1)
+
+        return idx
+
+
+def read_recording(path: str) -> Recording:
+    """
+    Opens a saved recording without loading it, see Recording.
+    """
+    return Recording(path)
+
+
+def find_saved(known_path: str = "") -> list:
+    """
+    Recordings saved by save_data/save_binary and ChunkedWriter in a folder.
+
+    Parameters
+    ----------
+    known_path : str
+        folder of the recordings, "current_dir/data/eeg" by default.
+
+    Returns
+    -------
+    list
+        header (.json) paths, one per recording. Pass them to read_recording().
+    """
+    data_path = known_path or os.path.join(os.getcwd(), "data", "eeg")
+    headers = glob.glob(os.path.join(data_path, "*_raw.json"))
+    headers += [p for p in glob.glob(os.path.join(data_path, "*.json")) if os.path.exists(p[:-len(".json")] + ".dat")]
+
+    return sorted(set(headers))
@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Writes recordings to disk while they are being recorded
+"""
+import json
+import os
+import numpy as np
+import mne
+from daedalus.ssvep.export import events_path
+
+
+class ChunkedWriter:
+    """
+    Appends incoming samples to a flat binary file on disk instead of keeping the recording in memory.
+
+    A recording made with base path `data/eeg/sub01` is stored as:
+        - sub01.dat: raw samples, sample-major (n_samples, n_channels).
+        - sub01.ts: float64 timestamp of every sample.
+        - sub01.json: index with the layout, channel names, sampling rate, events and subject info.
+
+    Samples are staged in a preallocated block of `flush_every` chunks that's appended (and fsync'ed) to the files
+    when it fills up, so a crash loses at most that many chunks. The writer has the same reserve()/commit()/append()
+    interface as EEGBuffer and can be given to get_raw_eeg() or an AcquisitionThread in its place.
+
+    Parameters
+    ----------
+    base_path : str
+        path of the recording without extension.
+
+    n_chans : int
+        number of channels.
+
+    chunk_size : int
+        largest number of samples written at once.
+
+    flush_every : int
+        number of chunks staged in memory between writes to disk.
+
+    dtype : numpy.dtype
+        sample type, has to match the stream's channel format when writing through reserve().
+
+    chan_names : list
+        channel names saved to the index.
+
+    sfreq : float
+        sampling rate saved to the index.
+
+    subject : dict
+        subject/session information saved to the index.
+    """
+
+    def __init__(self, base_path: str, n_chans: int, chunk_size: int, flush_every: int = 10, dtype=np.float32,
+                 chan_names: list = None, sfreq: float = None, subject: dict = None) -> None:
+
+        self.base_path = base_path
+        self.n_chans = n_chans
+        self.chunk_size = chunk_size
+        self.flush_every = flush_every
+        self.dtype = np.dtype(dtype)
+
+        self._index = {
+            "layout": "samples",
+            "dtype": self.dtype.str,
+            "n_chans": n_chans,
+            "n_samples": 0,
+            "sfreq": sfreq,
+            "chan_names": list(chan_names) if chan_names is not None else None,
+            "subject": subject or {},
+            "events": [],
+            "event_id": {}
+        }
+
+        self._staging = np.empty((flush_every * chunk_size, n_chans), dtype=self.dtype)
+        self._staging_ts = np.empty(flush_every * chunk_size, dtype=np.float64)
+        self._fill = 0
+        self._n_chunks = 0
+        self._n_samples = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(base_path)), exist_ok=True)
+        self._data_file = open(base_path + ".dat", "wb")
+        self._ts_file = open(base_path + ".ts", "wb")
+        self._write_index()
+
+    def __len__(self) -> int:
+        return self._n_samples
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._data_file.closed
+
+    def reserve(self) -> np.ndarray:
+        """
+        Writable block in the staging area for one full chunk. Flushes first if there isn't room.
+
+        Returns
+        -------
+        numpy.ndarray
+            C-contiguous (chunk_size, n_channels) view.
+        """
+        if len(self._staging) - self._fill < self.chunk_size:
+            self.flush()
+
+        return self._staging[self._fill:self._fill + self.chunk_size]
+
+    def commit(self, timestamps) -> None:
+        """
+        Marks the first len(timestamps) rows of the reserved block as recorded.
+
+        Parameters
+        ----------
+        timestamps : list or numpy.ndarray
+            one timestamp per sample that was written into the block.
+        """
+        n_new = len(timestamps)
+
+        self._staging_ts[self._fill:self._fill + n_new] = timestamps
+        self._fill += n_new
+        self._n_samples += n_new
+        self._n_chunks += 1
+
+        if self._n_chunks % self.flush_every == 0:
+            self.flush()
+
+    def append(self, samples, timestamps) -> None:
+        """
+        Copies samples that are already in memory into the staging area.
+
+        Parameters
+        ----------
+        samples : list or numpy.ndarray
+            (n_samples, n_channels) sample-major data.
+
+        timestamps : list or numpy.ndarray
+            one timestamp per sample.
+        """
+        samples = np.asarray(samples, dtype=self.dtype).reshape(-1, self.n_chans)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+
+        start = 0
+        while start < len(samples):
+            if self._fill == len(self._staging):
+                self.flush()
+
+            stop = start + min(len(self._staging) - self._fill, len(samples) - start)
+            self._staging[self._fill:self._fill + stop - start] = samples[start:stop]
+            self._staging_ts[self._fill:self._fill + stop - start] = timestamps[start:stop]
+            self._fill += stop - start
+            self._n_samples += stop - start
+
+            start = stop
+
+        self._n_chunks += 1
+        if self._n_chunks % self.flush_every == 0:
+            self.flush()
+
+    def add_events(self, events, event_id: dict = None) -> None:
+        """
+        Adds events to the index. They're written with the next flush.
+
+        Parameters
+        ----------
+        events : list or numpy.ndarray
+            rows of [sample, previous value, event id] as in MNE's events arrays.
+
+        event_id : dict
+            marker label of the event ids, as returned by alignment.align_markers().
+        """
+        self._index["events"].extend(np.asarray(events).tolist())
+        if event_id:
+            self._index["event_id"].update(event_id)
+
+    def flush(self) -> None:
+        """
+        Appends the staged samples to disk and updates the index.
+        """
+        if self._fill:
+            self._staging[:self._fill].tofile(self._data_file)
+            self._staging_ts[:self._fill].tofile(self._ts_file)
+            self._fill = 0
+
+        for f in (self._data_file, self._ts_file):
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._index["n_samples"] = self._n_samples
+        self._write_index()
+
+    def close(self) -> None:
+        """
+        Flushes what's left and closes the files.
+        """
+        if self.closed:
+            return
+
+        self.flush()
+        self._data_file.close()
+        self._ts_file.close()
+
+    def data(self) -> np.ndarray:
+        """
+        Memory-mapped view of everything on disk, in MNE's (n_channels, n_samples) layout.
+
+        Returns
+        -------
+        numpy.memmap
+        """
+        return load_stream(self.base_path)[0]
+
+    def timestamps(self) -> np.ndarray:
+        """
+        Timestamps of everything on disk.
+
+        Returns
+        -------
+        numpy.memmap
+        """
+        n_samples = os.path.getsize(self.base_path + ".ts") // 8
+        if not n_samples:
+            return np.empty(0)
+
+        return np.memmap(self.base_path + ".ts", dtype=np.float64, mode="r", shape=(n_samples,))
+
+    def finalize(self, fname: str = None, montage: str = "standard_1005", overwrite: bool = False) -> str:
+        """
+        Closes the recording and converts it to FIF (raw and events), reading it from disk a buffer at a time.
+
+        Parameters
+        ----------
+        fname : str
+            FIF file to write, `{base_path}_raw.fif` by default. Events go next to it as `event_{base}-eve.fif`
+            (export.events_path), if there are any.
+
+        montage : str
+            name of the standard montage to set, or None.
+
+        overwrite : bool
+            overwrite existing FIF files.
+
+        Returns
+        -------
+        str
+            path of the raw FIF file.
+        """
+        self.close()
+
+        if fname is None:
+            fname = self.base_path + "_raw.fif"
+
+        raw = read_raw_stream(self.base_path, montage=montage)
+
+        # not preloaded, so save() pulls one buffer at a time through _read_segment_file
+        raw.save(fname, overwrite=overwrite)
+
+        events = np.asarray(self._index["events"], dtype=int).reshape(-1, 3)
+        if len(events):
+            mne.write_events(events_path(fname), events, overwrite=overwrite)
+
+        return fname
+
+    def _write_index(self) -> None:
+        """
+        Replaces the index file atomically so a crash never leaves half of it on disk.
+        """
+        tmp_path = self.base_path + ".json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.base_path + ".json")
+
+
+class RawStream(mne.io.BaseRaw):
+    """
+    MNE Raw object reading the samples of a ChunkedWriter recording lazily from disk.
+
+    Parameters
+    ----------
+    base_path : str
+        path of the recording without extension.
+
+    montage : str
+        name of a standard montage to set, or None.
+    """
+
+    def __init__(self, base_path: str, montage: str = None) -> None:
+
+        data, index = load_stream(base_path)
+
+        chan_names = index["chan_names"] or [f"EEG{i + 1:03d}" for i in range(index["n_chans"])]
+        info = mne.create_info(ch_names=chan_names, sfreq=index["sfreq"], ch_types="eeg")
+
+        super().__init__(
+            info,
+            preload=False,
+            last_samps=(data.shape[1] - 1,),
+            filenames=[base_path + ".dat"],
+            raw_extras=[{"dtype": index["dtype"], "n_chans": index["n_chans"], "n_samples": data.shape[1]}],
+            orig_format="single"
+        )
+
+        if montage is not None:
+            self.set_montage(montage, on_missing="ignore")
+
+    def _read_segment_file(self, data, idx, fi, start, stop, cals, mult):
+        """
+        Reads samples [start, stop) of all channels and keeps the `idx` ones.
+        """
+        extras = self._raw_extras[fi]
+        samples = np.memmap(self.filenames[fi], dtype=extras["dtype"], mode="r",
+                            shape=(extras["n_samples"], extras["n_chans"]))
+        block = np.asarray(samples[start:stop].T, dtype=data.dtype)
+
+        if mult is not None:
+            data[:] = mult @ block[idx]
+        else:
+            data[:] = block[idx] * np.reshape(cals, (-1, 1))
+
+
+def load_stream(base_path: str) -> tuple:
+    """
+    Opens a ChunkedWriter recording without reading it into memory. Works on recordings that were cut short by a
+    crash too: the number of samples comes from the size of the data file, not from the (possibly stale) index.
+
+    Parameters
+    ----------
+    base_path : str
+        path of the recording without extension.
+
+    Returns
+    -------
+    tuple
+        (n_channels, n_samples) memmap of the data and the index dict.
+    """
+    with open(base_path + ".json") as f:
+        index = json.load(f)
+
+    dtype = np.dtype(index["dtype"])
+    n_samples = os.path.getsize(base_path + ".dat") // (dtype.itemsize * index["n_chans"])
+    index["n_samples"] = n_samples
+
+    if n_samples:
+        data = np.memmap(base_path + ".dat", dtype=dtype, mode="r", shape=(n_samples, index["n_chans"])).T
+    else:
+        data = np.empty((index["n_chans"], 0), dtype=dtype)
+
+    return data, index
+
+
+def read_raw_stream(base_path: str, montage: str = None) -> RawStream:
+    """
+    Opens a ChunkedWriter recording as a (not preloaded) MNE Raw object.
+
+    Parameters
+    ----------
+    base_path : str
+        path of the recording without extension.
+
+    montage : str
+        name of a standard montage to set, or None.
+
+    Returns
+    -------
+    RawStream
+    """
+    return RawStream(base_path, montage=montage)
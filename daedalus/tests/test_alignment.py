@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from daedalus.ssvep.alignment import align_markers, marker_codes
+
+
+def test_align_markers_string_markers():
+    eeg_ts = np.arange(100) / 100
+    marker_ts = [.101, .5, .894]
+    markers = ["stim_12Hz", "rest", "stim_12Hz"]
+
+    events, event_id = align_markers(eeg_ts, marker_ts, markers)
+
+    assert event_id == {"rest": 1, "stim_12Hz": 2}
+    assert events[:, 0].tolist() == [10, 50, 89]
+    assert events[:, 2].tolist() == [2, 1, 2]
+
+
+def test_align_markers_numeric_markers_keep_their_codes():
+    events, event_id = align_markers(np.arange(10.), [2., 7.], np.array([3, 11]))
+
+    assert events[:, 2].tolist() == [3, 11]
+    assert event_id == {"3": 3, "11": 11}
+
+
+def test_marker_codes_extends_given_event_id():
+    labels, event_id = marker_codes(["2", "left", "right", "left"], event_id={"left": 5})
+
+    assert labels == ["2", "left", "right", "left"]
+    assert event_id == {"left": 5, "2": 2, "right": 6}
+
+
+def test_align_markers_drops_markers_outside_recording():
+    eeg_ts = np.arange(10.) + 100
+
+    with pytest.warns(UserWarning, match="2 of 4 markers"):
+        events, event_id = align_markers(eeg_ts, [99., 102., 109., 110.], ["early", "stim", "rest", "late"])
+
+    assert events[:, 0].tolist() == [2, 9]
+    assert events[:, 2].tolist() == [event_id["stim"], event_id["rest"]]
+
+
+def test_align_markers_without_samples():
+    with pytest.warns(UserWarning):
+        events, event_id = align_markers([], [.5], ["stim"])
+
+    assert events.shape == (0, 3)
+    assert event_id == {"stim": 1}
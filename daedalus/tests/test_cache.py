@@ -0,0 +1,38 @@
+import os
+import pandas as pd
+from daedalus.analysis.cache import SessionCache
+
+
+def _args(cache):
+    return sorted(entry["args"] for entry in cache._index.values())
+
+
+def test_miss_keeps_same_version_read_with_other_arguments(tmp_path):
+    path = tmp_path / "01.csv"
+    pd.DataFrame({"a": [1, 2], "b": [3, 4]}).to_csv(path, index=False)
+    cache = SessionCache(str(tmp_path / "cache"))
+
+    cache.load(str(path))
+    cache.load(str(path), usecols=["a"])
+
+    assert _args(cache) == sorted([repr([]), repr([("usecols", ["a"])])])
+    assert cache.load(str(path), usecols=["a"])["a"].tolist() == [1, 2]
+
+
+def test_miss_drops_every_copy_of_changed_file(tmp_path):
+    path = tmp_path / "01.csv"
+    pd.DataFrame({"a": [1, 2], "b": [3, 4]}).to_csv(path, index=False)
+    cache = SessionCache(str(tmp_path / "cache"))
+
+    cache.load(str(path))
+    cache.load(str(path), usecols=["a"])
+
+    # the file changes: the plain copy is replaced and the usecols copy of the old version goes too
+    pd.DataFrame({"a": [5], "b": [6]}).to_csv(path, index=False)
+    os.utime(path, ns=(1, 1))
+
+    df = cache.load(str(path))
+
+    assert df["a"].tolist() == [5]
+    assert _args(cache) == [repr([])]
+    assert len(os.listdir(cache.cache_dir)) == 2
@@ -0,0 +1,38 @@
+import time
+import numpy as np
+from daedalus.ssvep.cyton import PACKET_SIZE, UV_PER_COUNT, CytonReader, ReplaySerial, encode_packets
+
+
+def test_reader_decodes_replay_and_resyncs_after_corrupt_packet():
+    rng = np.random.default_rng(0)
+    eeg = rng.normal(scale=50, size=(100, 8))
+    aux = rng.uniform(-1, 1, size=(100, 3))
+
+    stream = bytearray(encode_packets(eeg, aux, first_sample=250))
+    # packet 40 loses its footer, so it has to be skipped and the reader has to find packet 41
+    stream[40 * PACKET_SIZE + PACKET_SIZE - 1] = 0x00
+
+    # reads that don't line up with packets leave partial ones for the next read
+    reader = CytonReader(ReplaySerial(bytes(stream)), read_size=100)
+    while reader.port.in_waiting:
+        reader.read()
+
+    kept = np.delete(np.arange(100), 40)
+    np.testing.assert_allclose(reader.buffer.to_array().T, eeg[kept], atol=UV_PER_COUNT)
+    np.testing.assert_allclose(np.concatenate(reader.aux), aux[kept], atol=.002)
+    assert [lost for _, lost in reader.drop_log] == [1]
+
+
+def test_reader_thread_starts_and_stops_the_board():
+    port = ReplaySerial(encode_packets(np.zeros((10, 8))))
+    reader = CytonReader(port)
+
+    reader.start()
+    while port.in_waiting:
+        time.sleep(.01)
+    reader.stop()
+    reader.join(timeout=5)
+
+    assert not reader.is_alive()
+    assert port.commands == [b"b", b"s"]
+    assert len(reader.buffer) == 10
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+from daedalus.analysis.data_utils import basic_prep_chunks, load_sessions
+
+
+def _session(**columns):
+    return pd.DataFrame(columns)
+
+
+def test_basic_prep_chunks_keeps_columns_of_differing_sessions(tmp_path):
+    first = _session(participant=[1, 1], TrialNumber=[0, 1], rt=[.5, .6], ran=[1, 1], date=["d1", "d1"])
+    # same columns in another order, and no rt
+    second = _session(TrialNumber=[0], ran=[1], participant=[9], date=["d2"])
+    third = _session(rt=[.3], date=["d3"], ran=[1], TrialNumber=[2], participant=[9])
+
+    out_path = str(tmp_path / "prep.csv")
+    subj_dates = basic_prep_chunks([first, second, third], out_path)
+
+    prep = pd.read_csv(out_path)
+    assert list(prep.columns) == ["participant", "TrialNumber", "rt"]
+    assert prep["participant"].tolist() == [1, 1, 9, 9]
+    assert prep["TrialNumber"].tolist() == [0, 1, 0, 2]
+    assert pd.isna(prep["rt"].iloc[2])
+    assert prep["rt"].iloc[3] == .3
+    assert subj_dates == [(1, "d1"), (9, "d2"), (9, "d3")]
+
+
+def test_basic_prep_chunks_refuses_new_columns(tmp_path):
+    first = _session(participant=[1], TrialNumber=[0], ran=[1], date=["d1"])
+    second = _session(participant=[2], TrialNumber=[0], acc=[1], ran=[1], date=["d2"])
+
+    with pytest.raises(ValueError):
+        basic_prep_chunks([first, second], str(tmp_path / "prep.csv"))
+
+
+def test_load_sessions_matches_concat(tmp_path):
+    sessions = [
+        _session(participant="s1", condition=["a", "b", "a"], TrialNumber=[0, 1, 2], rt=[.4, .5, .6]),
+        _session(participant="s2", condition=["c", None], TrialNumber=[0, 1], extra=["x", "y"]),
+    ]
+    files = []
+    for i, session in enumerate(sessions):
+        files.append(str(tmp_path / "{}.csv".format(i)))
+        session.to_csv(files[-1], index=False)
+
+    df = load_sessions(files, n_jobs=1)
+    expected = pd.concat([pd.read_csv(path) for path in files], ignore_index=True)
+
+    assert list(df.columns) == list(expected.columns)
+    assert df["condition"].cat.categories.tolist() == ["a", "b", "c"]
+    for col in expected:
+        assert df[col].astype(object).where(df[col].notna(), None).tolist() == \
+            expected[col].astype(object).where(expected[col].notna(), None).tolist()
@@ -0,0 +1,33 @@
+import numpy as np
+from daedalus.ssvep.decoder import cca_scores, fbcca_scores
+
+FREQS = [8., 9., 10., 11., 12., 13., 14., 15.]
+SFREQ = 250.
+
+
+def _windows(n_samples, offset, n_trials=5, seed=1):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples) / SFREQ
+    for _ in range(n_trials):
+        for i, freq in enumerate(FREQS):
+            phase = rng.uniform(0, 2 * np.pi)
+            ssvep = [np.sin(2 * np.pi * freq * t + phase + k) + .5 * np.sin(4 * np.pi * freq * t + phase)
+                     for k in range(8)]
+            # electrode offsets like raw amplifier data, the filters mustn't ring on them
+            yield i, np.stack(ssvep) + rng.normal(scale=2, size=(8, n_samples)) + offset * rng.normal(size=(8, 1))
+
+
+def test_fbcca_as_accurate_as_cca_on_offset_windows():
+    cca, fbcca = 0, 0
+    for target, window in _windows(250, offset=1000.):
+        cca += np.argmax(cca_scores(window, FREQS, SFREQ)) == target
+        fbcca += np.argmax(fbcca_scores(window, FREQS, SFREQ)) == target
+
+    assert cca == fbcca == 40
+
+
+def test_fbcca_ignores_constant_offset():
+    _, window = next(_windows(250, offset=0.))
+    shifted = window + 5000.
+
+    np.testing.assert_allclose(fbcca_scores(shifted, FREQS, SFREQ), fbcca_scores(window, FREQS, SFREQ), rtol=1e-6)
@@ -0,0 +1,30 @@
+import numpy as np
+from daedalus.analysis.features import extract_features, find_recordings
+from daedalus.ssvep.writer import ChunkedWriter
+
+
+def test_writer_recording_to_features(tmp_path):
+    sfreq, n_samples, chunk = 250., 250 * 20, 50
+    t = np.arange(n_samples) / sfreq
+    signal = np.stack([np.sin(2 * np.pi * 12 * t), np.sin(2 * np.pi * 15 * t)], axis=1).astype(np.float32)
+    noise = np.random.default_rng(0).normal(scale=.1, size=signal.shape).astype(np.float32)
+
+    writer = ChunkedWriter(str(tmp_path / "01_session1"), 2, chunk, chan_names=["O1", "O2"], sfreq=sfreq)
+    for start in range(0, n_samples, chunk):
+        writer.append(signal[start:start + chunk] + noise[start:start + chunk], t[start:start + chunk])
+    writer.add_events([[250, 0, 1], [1500, 0, 1], [2750, 0, 2]], {"stim": 1, "rest": 2})
+    writer.finalize(montage=None)
+
+    files = find_recordings(str(tmp_path))
+    assert [f.rsplit("/", 1)[1] for f in files] == ["01_session1_raw.fif"]
+
+    df = extract_features(files, freqs=[12., 15.], n_jobs=1, tmin=0., tmax=4., n_harmonics=1)
+
+    assert len(df) == 3 * 2 * 2
+    assert set(df["participant"]) == {"01"}
+    assert df["event"].tolist()[:4] == [1] * 4
+
+    snr = df.set_index(["epoch", "channel", "freq"])["snr"]
+    assert (snr.xs(("O1", 12.), level=["channel", "freq"]) > 5).all()
+    assert (snr.xs(("O2", 15.), level=["channel", "freq"]) > 5).all()
+    assert (snr.xs(("O1", 15.), level=["channel", "freq"]) < 5).all()
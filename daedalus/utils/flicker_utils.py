@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Precomputed flicker schedules for SSVEP stimuli
+"""
+import numpy as np
+
+# uint8 level -> opacity, so a frame's opacities are one table lookup
+_OPACITY = np.linspace(0, 1, 256, dtype=np.float32)
+
+
+class FlickerSchedule:
+    """
+    Luminance of any number of flickering targets on every frame, computed once before the trial.
+
+    The phase of each target advances by freq / refresh_rate cycles per frame, so frequencies that aren't a divisor
+    of the refresh rate (e.g. 17 Hz at 240 Hz) are still right on average: the phase on frame n is computed as
+    n * freq / refresh_rate directly, which doesn't drift the way adding the step up frame by frame does. Levels
+    are stored as a (n_frames, n_targets) uint8 table so looking up a frame is a single row index::
+
+        schedule = FlickerSchedule([8.57, 10, 12, 15], n_frames=4 * 240, refresh_rate=240)
+        for frame in range(schedule.n_frames):
+            opacities = schedule.opacities(frame)
+            ...
+
+    Parameters
+    ----------
+    freqs : list
+        flicker frequency of every target in Hz.
+
+    n_frames : int
+        number of frames of the schedule.
+
+    refresh_rate : float
+        monitor's refresh rate.
+
+    waveform : str
+        "square" (on/off) or "sine" (sampled sinusoidal luminance, 0.5 * (1 + sin(phase))).
+
+    phases : list
+        starting phase of every target in cycles (0 to 1), 0 for all by default.
+
+    duty : float
+        fraction of each cycle a square wave is on.
+    """
+
+    def __init__(self, freqs, n_frames: int, refresh_rate: float, waveform: str = "square", phases=None,
+                 duty: float = .5) -> None:
+
+        if waveform not in ("square", "sine"):
+            raise ValueError(f"Unknown waveform {waveform}, use 'square' or 'sine'.")
+
+        self.freqs = np.atleast_1d(np.asarray(freqs, dtype=np.float64))
+        self.n_frames = int(n_frames)
+        self.refresh_rate = refresh_rate
+        self.waveform = waveform
+        self.phases = np.zeros(len(self.freqs)) if phases is None else np.asarray(phases, dtype=np.float64)
+        self.duty = duty
+
+        frames = np.arange(self.n_frames, dtype=np.float64)
+        phase = np.mod(np.multiply.outer(frames, self.freqs / refresh_rate) + self.phases, 1.)
+
+        if waveform == "square":
+            levels = np.where(phase < duty, 255, 0)
+        else:
+            levels = np.round(127.5 * (1 + np.sin(2 * np.pi * phase)))
+
+        self.levels = np.ascontiguousarray(levels, dtype=np.uint8)
+        self.levels.setflags(write=False)
+
+    @classmethod
+    def from_duration(cls, freqs, duration: float, refresh_rate: float, **kwargs) -> "FlickerSchedule":
+        """
+        Schedule lasting `duration` seconds.
+        """
+        return cls(freqs, int(duration * refresh_rate), refresh_rate, **kwargs)
+
+    def __len__(self) -> int:
+        return self.n_frames
+
+    def __getitem__(self, frame) -> np.ndarray:
+        """
+        uint8 levels (0 to 255) of every target on a frame.
+        """
+        return self.levels[frame]
+
+    @property
+    def n_targets(self) -> int:
+        return len(self.freqs)
+
+    def opacities(self, frame: int) -> np.ndarray:
+        """
+        Opacity (0 to 1) of every target on a frame, e.g. for ElementArrayStim.opacities.
+        """
+        return _OPACITY[self.levels[frame]]
+
+    def is_on(self, frame: int, target: int = 0) -> bool:
+        """
+        Whether a target is in the bright half of its cycle on a frame.
+        """
+        return bool(self.levels[frame, target] > 127)
+
+    def on_frames(self, target: int = 0) -> np.ndarray:
+        """
+        Frames a target is on.
+        """
+        return np.flatnonzero(self.levels[:, target] > 127)
+
+    def off_frames(self, target: int = 0) -> np.ndarray:
+        """
+        Frames a target is off.
+        """
+        return np.flatnonzero(self.levels[:, target] <= 127)
+
+    def actual_freqs(self) -> np.ndarray:
+        """
+        Frequencies the schedule really flickers at (on-transitions per second), to check what a monitor can show.
+        """
+        on = self.levels > 127
+        onsets = np.count_nonzero(on[1:] & ~on[:-1], axis=0) + on[0]
+
+        return onsets * self.refresh_rate / max(self.n_frames, 1)
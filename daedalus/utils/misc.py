@@ -42,10 +42,35 @@ def jitter(time: int, lag) -> float:
     float
         modified duration
     """
-    durations = np.linspace(-lag, lag, num=10)
-    time += np.random.choice(durations, 1)
+    return float(jittered(time, lag)) / 1000
 
-    return time/1000
+
+def jittered(value, amount, size=None, rng=None) -> np.ndarray:
+    """
+    Vectorised jitter: every value moves by one of 10 evenly spaced steps between -amount and +amount
+
+    Parameters
+    ----------
+    value : float or array_like
+        durations (in milliseconds).
+    amount : float or array_like
+        minimum/maximum amount of jitter, broadcast against `value`.
+    size : int or tuple
+        number of draws, the broadcast shape of `value` and `amount` by default.
+    rng : numpy.random.Generator
+        source of the jitter, a fresh generator by default.
+
+    Returns
+    -------
+    numpy.ndarray
+        jittered durations, in the unit of `value`
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    value, amount = np.asarray(value, dtype=np.float64), np.asarray(amount, dtype=np.float64)
+    size = np.broadcast(value, amount).shape if size is None else size
+    steps = np.linspace(-1, 1, num=10)[rng.integers(0, 10, size=size)]
+
+    return value + amount * steps
 
 # TODO: add jitter position function
 
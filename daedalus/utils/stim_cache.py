@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+"""
+created 10/18/26
+
+@author DevXl
+
+Stimulus images decoded ahead of time and kept ready to draw
+"""
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait
+from PIL import Image
+
+
+class StimCache:
+    """
+    Decodes stimulus images on a thread pool before they're needed and keeps them, as images and as ImageStims
+    whose textures are already on the GPU, so showing another image during a trial is a dictionary lookup.
+
+    Decoding happens on the worker threads, anything touching OpenGL (making the ImageStims) happens on the thread
+    that calls get()/upload(). The least recently used entries are dropped when the cache holds more than
+    `max_bytes` of decoded pixels (host copies plus textures)::
+
+        cache = StimCache(win, size=(512, 512), stim_kwargs={"size": 6})
+        cache.preload(load_stim("faces", "png"))
+        cache.upload()  # before the block starts
+        ...
+        left = cache.get(face_path)
+        left.pos = (-6, 0)
+        left.draw()
+
+    Parameters
+    ----------
+    window : psychopy.visual.Window
+        window the stimuli are drawn in. Without one only decoded images are cached (image()).
+
+    max_bytes : int
+        memory limit of the cache.
+
+    n_workers : int
+        decoding threads.
+
+    size : tuple
+        (width, height) pixels images are scaled down to while decoding (keeping their aspect ratio), no scaling
+        by default.
+
+    stim_kwargs : dict
+        arguments of every visual.ImageStim, e.g. size or units.
+    """
+
+    def __init__(self, window=None, max_bytes: int = 2 ** 29, n_workers: int = 4, size: tuple = None,
+                 stim_kwargs: dict = None) -> None:
+
+        self.window = window
+        self.max_bytes = max_bytes
+        self.size = size
+        self.stim_kwargs = stim_kwargs or {}
+
+        self._pool = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="StimDecode")
+        self._pending = {}
+        self._images = collections.OrderedDict()
+        self._stims = {}
+        self._nbytes = 0
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._images or path in self._pending
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes of decoded pixels held, host copies plus textures.
+        """
+        return self._nbytes
+
+    def preload(self, paths) -> int:
+        """
+        Starts decoding images that aren't cached or being decoded yet. Returns right away.
+
+        Returns
+        -------
+        int
+            number of images queued.
+        """
+        queued = 0
+        for path in paths:
+            if path not in self:
+                self._pending[path] = self._pool.submit(_decode, path, self.size)
+                queued += 1
+
+        return queued
+
+    def wait(self, paths=None, timeout: float = None) -> None:
+        """
+        Blocks until the given images (or everything queued) are decoded.
+        """
+        futures = [self._pending[p] for p in (self._pending if paths is None else paths) if p in self._pending]
+        wait(futures, timeout=timeout)
+        self._collect()
+
+    def ready(self, paths) -> list:
+        """
+        The given images that are decoded and can be drawn without waiting.
+        """
+        self._collect()
+        return [path for path in paths if path in self._images]
+
+    def upload(self, paths=None) -> None:
+        """
+        Makes the ImageStims (and so the textures) of the given images, or of all cached ones, so the first draw
+        doesn't have to. Call it from the drawing thread, e.g. before a block.
+        """
+        self.wait(paths)
+        for path in list(self._images if paths is None else paths):
+            self.get(path)
+
+    def image(self, path: str) -> Image.Image:
+        """
+        Decoded image, decoding it now if it wasn't preloaded.
+        """
+        self._collect()
+        if path not in self._images:
+            if path in self._pending:
+                self.wait([path])
+            else:
+                self._add(path, _decode(path, self.size))
+
+        self._images.move_to_end(path)
+
+        return self._images[path]
+
+    def get(self, path: str):
+        """
+        ImageStim showing an image, ready to draw.
+
+        Returns
+        -------
+        psychopy.visual.ImageStim
+        """
+        stim = self._stims.get(path)
+        if stim is not None:
+            self._images.move_to_end(path)
+            return stim
+
+        if self.window is None:
+            raise RuntimeError("StimCache needs a window to make stimuli, use image() without one.")
+
+        from psychopy import visual
+
+        image = self.image(path)
+        stim = visual.ImageStim(self.window, image=image, **self.stim_kwargs)
+        self._stims[path] = stim
+        self._nbytes += _texture_bytes(image)
+        self.evict()
+
+        return stim
+
+    def discard(self, paths) -> None:
+        """
+        Drops images (and their stimuli) that won't be shown again, and cancels their decoding if it didn't start.
+        """
+        for path in paths:
+            future = self._pending.pop(path, None)
+            if future is not None:
+                future.cancel()
+            if path in self._images:
+                self._remove(path)
+
+    def evict(self) -> None:
+        """
+        Drops least recently used images until the cache fits in max_bytes.
+        """
+        while self._nbytes > self.max_bytes and len(self._images) > 1:
+            self._remove(next(iter(self._images)))
+
+    def clear(self) -> None:
+        self.discard(list(self._pending) + list(self._images))
+
+    def close(self) -> None:
+        """
+        Stops the decoding threads and empties the cache.
+        """
+        self.clear()
+        self._pool.shutdown(wait=True)
+
+    def _collect(self) -> None:
+        """
+        Moves finished decodes into the cache. Runs on the caller's thread so the cache is only changed there.
+        """
+        done = [path for path, future in self._pending.items() if future.done()]
+        for path in done:
+            future = self._pending.pop(path)
+            if not future.cancelled():
+                self._add(path, future.result())
+
+    def _add(self, path: str, image: Image.Image) -> None:
+        self._images[path] = image
+        self._nbytes += _image_bytes(image)
+        self.evict()
+
+    def _remove(self, path: str) -> None:
+        image = self._images.pop(path)
+        self._nbytes -= _image_bytes(image)
+
+        stim = self._stims.pop(path, None)
+        if stim is not None:
+            self._nbytes -= _texture_bytes(image)
+
+
+class StimPrefetcher:
+    """
+    Keeps only the images of the next few trials in a StimCache: looks ahead in the trial order of a TrialHandler,
+    queues the images coming up for decoding and drops the ones of trials that are over.
+
+    Call step() whenever there's time to spare (rest screens, ITIs). It only queues work for the cache's decoding
+    threads and makes textures for images that are already decoded, so it never waits on the disk::
+
+        exp.add_handler("main", conditions)
+        prefetcher = StimPrefetcher(cache, exp.handlers["main"], keys=["left_image", "right_image"], lookahead=8)
+        prefetcher.step()
+        for trial in exp.handlers["main"]:
+            ...  # draw cache.get(trial["left_image"]) etc.
+            prefetcher.step()  # during the ITI
+
+    Parameters
+    ----------
+    cache : StimCache
+
+    trials : psychopy.data.TrialHandler
+        handler whose trial order is followed, or a list of the conditions in the order they're shown.
+
+    keys : list
+        condition entries holding image paths.
+
+    paths : callable
+        function returning the image paths of a condition, instead of `keys`.
+
+    lookahead : int
+        number of upcoming trials whose images are kept ready.
+    """
+
+    def __init__(self, cache: StimCache, trials, keys=(), paths=None, lookahead: int = 10) -> None:
+
+        self.cache = cache
+        self.handler = trials if hasattr(trials, "sequenceIndices") else None
+        self.lookahead = lookahead
+
+        if self.handler is not None:
+            # TrialHandler goes through sequenceIndices one repetition (column) at a time
+            order = self.handler.sequenceIndices.T.ravel()
+            trials = [self.handler.trialList[int(i)] for i in order]
+
+        paths = paths if paths is not None else (lambda cond: [cond[key] for key in keys if cond.get(key)])
+        self.trial_paths = [list(paths(cond)) for cond in trials]
+
+        self._dropped_until = 0
+
+    def __len__(self) -> int:
+        return len(self.trial_paths)
+
+    @property
+    def current(self) -> int:
+        """
+        Number of the running trial (the next one before the handler starts). Without a handler it's the last
+        trial given to step().
+        """
+        if self.handler is None:
+            return self._dropped_until
+
+        return max(self.handler.thisN, 0)
+
+    def step(self, current: int = None, upload: bool = True) -> int:
+        """
+        Queues the images of the next `lookahead` trials, drops images of past trials that aren't among them and
+        makes the textures of those that are decoded.
+
+        Parameters
+        ----------
+        current : int
+            number of the running trial, taken from the handler by default.
+
+        upload : bool
+            also make the ImageStims of the decoded upcoming images (needs the cache to have a window; call from
+            the drawing thread).
+
+        Returns
+        -------
+        int
+            number of images queued for decoding.
+        """
+        current = self.current if current is None else current
+
+        upcoming = [path for trial_paths in self.trial_paths[current:current + self.lookahead + 1]
+                    for path in trial_paths]
+        upcoming = list(dict.fromkeys(upcoming))
+
+        # images of trials that are over go unless they come up again soon, later repeats are decoded again then
+        keep = set(upcoming)
+        finished = [path for n in range(self._dropped_until, current) for path in self.trial_paths[n]
+                    if path not in keep]
+        self.cache.discard(finished)
+        self._dropped_until = max(self._dropped_until, current)
+
+        queued = self.cache.preload(upcoming)
+
+        if upload and self.cache.window is not None:
+            self.cache.upload(self.cache.ready(upcoming))
+
+        return queued
+
+
+def _decode(path: str, size: tuple = None) -> Image.Image:
+    """
+    Reads and decodes an image file completely (PIL only reads the header on open).
+    """
+    with Image.open(path) as f:
+        if size is not None:
+            f.draft(f.mode, size)
+            f.thumbnail(size)
+        f.load()
+        image = f.copy()
+
+    return image
+
+
+def _image_bytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+def _texture_bytes(image: Image.Image) -> int:
+    """
+    psychopy uploads images as RGBA textures.
+    """
+    return image.width * image.height * 4
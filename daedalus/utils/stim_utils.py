@@ -7,6 +7,8 @@ created 1/13/20
 Stimulus commonly used in psychophysics experiments
 """
 from psychopy import visual
+from daedalus.utils.flicker_utils import FlickerSchedule
+from daedalus.utils.stim_cache import StimCache
 import os
 import glob
 
@@ -72,6 +74,65 @@ def get_statics(window, pos):
     return statics
 
 
+class FlickerArray:
+    """
+    All flickering targets drawn as one ElementArrayStim, with their opacities on every frame taken from a
+    FlickerSchedule. One draw call per frame however many targets there are, instead of one per ImageStim
+
+    Parameters
+    ----------
+    window (psychopy.Window) win param for psychopy.visual stuff
+    xys (list) position of every target, in the order of the schedule's frequencies
+    schedule (FlickerSchedule) opacities of the targets on every frame
+    sizes (float or list) size of all targets or of each one
+    tex (str or numpy.ndarray) texture shared by all targets (image path, array or psychopy name), plain by default
+    mask (str) element mask, e.g. "circle"
+    colors (tuple) color of the targets
+    units (str) units of positions and sizes, the window's by default
+    loop (bool) start the schedule over when the frame number passes its end
+    """
+
+    def __init__(self, window, xys, schedule, sizes=6, tex=None, mask=None, colors=(1, 1, 1), units=None, loop=True):
+
+        if len(xys) != schedule.n_targets:
+            raise ValueError("Got {} positions for {} flicker frequencies.".format(len(xys), schedule.n_targets))
+
+        self.schedule = schedule
+        self.loop = loop
+        self.stim = visual.ElementArrayStim(
+            win=window,
+            units=units,
+            nElements=schedule.n_targets,
+            xys=xys,
+            sizes=sizes,
+            elementTex=tex,
+            elementMask=mask,
+            colors=colors,
+            opacities=schedule.opacities(0)
+        )
+
+    @classmethod
+    def from_stims(cls, window, stims, schedule, **kwargs):
+        """
+        Replaces separate ImageStims (e.g. the "images" of get_statics) that show the same image at different places
+        """
+        xys = [stim.pos for stim in stims]
+        sizes = [stim.size for stim in stims]
+        kwargs.setdefault("tex", stims[0].image)
+
+        return cls(window, xys, schedule, sizes=sizes, **kwargs)
+
+    def draw(self, frame):
+        """
+        Draws every target with its opacity on this frame
+        """
+        if self.loop:
+            frame %= len(self.schedule)
+
+        self.stim.opacities = self.schedule.opacities(frame)
+        self.stim.draw()
+
+
 def load_stim(category, file_type, known_path=""):
     """
     Loads the stimulus paths
@@ -104,9 +165,32 @@ def load_stim(category, file_type, known_path=""):
     return stim_files
 
 
+def preload_stim(category, file_type, window=None, known_path="", **kwargs):
+    """
+    Loads the stimulus paths and starts decoding all of them in the background
+
+    Parameters
+    ----------
+    category (str) faces, places, composites, etc.
+    file_type (str) file extensions
+    window (psychopy.Window) window the stimuli are drawn in
+    known_path (str) the path to use for loading the files in case it is known
+    kwargs: passed to StimCache (max_bytes, n_workers, size, stim_kwargs)
+
+    Returns
+    -------
+    cache (StimCache) call cache.upload() before the block and cache.get(path) to draw a stimulus
+    """
+    cache = StimCache(window, **kwargs)
+    cache.preload(load_stim(category, file_type, known_path))
+
+    return cache
+
+
 def flicker(freq, num_frames, refresh_rate):
     """
-    Gives the on and off frames for SSVEP
+    Gives the on and off frames for SSVEP. For drawing, look frames up in a FlickerSchedule directly instead of
+    searching these arrays
 
     Parameters
     ----------
@@ -120,26 +204,8 @@ def flicker(freq, num_frames, refresh_rate):
     -------
     frames (tuple) two arrays corresponding to "on" and "off" frame numbers
     """
+    schedule = FlickerSchedule(freq, num_frames, refresh_rate)
 
-    freq_frame = (refresh_rate / 2) / freq
-    on_frames = []
-    off_frames = []
-    frame_counter = 0
-
-    for fr in range(int(num_frames)):
-
-        if frame_counter < freq_frame:
-            change_state = False
-            frame_counter += 1
-        else:
-            change_state = True
-            frame_counter = 1
-
-        if change_state:
-            on_frames.append(fr)
-        else:
-            off_frames.append(fr)
-
-    frames = on_frames, off_frames
+    frames = schedule.on_frames(), schedule.off_frames()
 
     return frames